@@ -0,0 +1,113 @@
+"""Benchmarks for the parser and exporter, run against a synthetic cache
+
+    python benchmark.py [--messages N] [--repeat R] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import timeit
+
+from columnar import check_annotations
+from datafiles import CLASSTOFORMAT, OlkDataFile
+from mailobjects import OlkMessage
+from pyolk import PyOLKReader
+from synthetic import OlkCacheWriter
+
+# Size of the entity header, before the main collection
+ENTITY_HEADER = 40
+
+
+def entity_bodies(reader):
+    # Main collection of each message data file, with its compiled schema
+    bodies = list()
+    for r in reader.db.execute("SELECT PathToDataFile FROM Mail"):
+        with open(reader._data_path(r['PathToDataFile']), 'rb') as f:
+            data = f.read()
+        class_id = int.from_bytes(data[16:20], 'little')
+        bodies.append((memoryview(data[ENTITY_HEADER:]), CLASSTOFORMAT[class_id]))
+    return bodies
+
+
+def run(path, out, repeat):
+    # Best time and number of items for each benchmark
+    reader = PyOLKReader(path)
+    bodies = entity_bodies(reader)
+    parser = OlkDataFile(None, unmapped=reader.unmapped)
+    # the same parser, interpreting each schema rather than compiled
+    interpreter = OlkDataFile(None, unmapped=reader.unmapped)
+    interpreter.COMPILED = False
+    table, query = reader._mail_query()
+    messages = list(reader.Messages.values())
+    events = list(reader.Events.values())
+
+    def export():
+        shutil.rmtree(out, ignore_errors=True)
+        reader.export(out)
+
+    benchmarks = [
+        ('parse_collection', len(bodies),
+            lambda: [parser.parse_collection(b, fmt) for b, fmt in bodies]),
+        ('interpret_collection', len(bodies),
+            lambda: [interpreter.parse_collection(b, fmt) for b, fmt in bodies]),
+        ('get_items', len(messages),
+            lambda: reader._get_items(table, query, OlkMessage)),
+        ('to_file messages', len(messages),
+            lambda: [m.to_file() for m in messages]),
+        ('to_file events', len(events),
+            lambda: [e.to_file() for e in events]),
+        ('export', len(reader.get_items()), export),
+        ]
+    results = dict()
+    for name, count, fn in benchmarks:
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results[name] = {'seconds': best, 'items': count}
+    reader.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON, to compare between runs')
+    args = parser.parse_args()
+
+    # Item annotations must match what the schemas decode, or columnar
+    # exports fail on the converted values
+    mismatches = check_annotations()
+    if mismatches:
+        raise SystemExit('Annotations not matching the schemas: ' + ', '.join(
+            f'{c}.{f} is {a.__name__}, decoded as '
+            + '/'.join(sorted(t.__name__ for t in types))
+            for c, f, a, types in mismatches
+            ))
+
+    tmp = tempfile.mkdtemp(prefix='pyolk-benchmark-')
+    try:
+        path = os.path.join(tmp, 'Profile')
+        OlkCacheWriter(path, args.seed).write(
+            messages=args.messages,
+            events=args.messages // 10,
+            contacts=args.messages // 10,
+            notes=args.messages // 100,
+            tasks=args.messages // 100,
+            )
+        results = run(path, os.path.join(tmp, 'Export'), args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, r in results.items():
+        per_item = r['seconds'] / r['items'] * 1e6 if r['items'] else 0
+        print(f"{name:<20} {r['seconds']:8.3f}s {per_item:10.1f}us/item")
+
+
+if __name__ == '__main__':
+    main()
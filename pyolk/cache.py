@@ -0,0 +1,133 @@
+"""Persistent cache of parsed olk* data files"""
+
+import os
+import pickle
+import sqlite3
+
+from datafiles import parse_data_file
+
+
+class OlkCache:
+    """SQLite sidecar holding the parsed contents of data files, keyed by
+    path, size and mtime, and evicting least recently used entries once it
+    grows past max_size bytes"""
+    # Bump when the parser's output changes, to drop stale entries
+    VERSION = 1
+    # Default size limit, in bytes of pickled data
+    MAX_SIZE = 1024 ** 3
+    # Writes between commits
+    COMMIT_EVERY = 256
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size or self.MAX_SIZE
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+
+        # Start over if the cache was written by a different parser version
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            self.db.execute("DROP TABLE IF EXISTS Records")
+            self.db.execute(f"PRAGMA user_version = {self.VERSION}")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS Records (
+                Path TEXT PRIMARY KEY,
+                Size INTEGER,
+                ModTime INTEGER,
+                Data BLOB,
+                Bytes INTEGER,
+                LastUsed INTEGER
+                )""")
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS Records_LastUsed ON Records (LastUsed)"
+            )
+
+        # Running totals, LastUsed is a counter rather than a timestamp
+        (self.total, self.clock) = self.db.execute(
+            "SELECT coalesce(sum(Bytes), 0), coalesce(max(LastUsed), 0) FROM Records"
+            ).fetchone()
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def parse(self, path, stats=None, unmapped=None):
+        # Parsed data for a data file, from the cache if it hasn't changed
+        data = self.get(path)
+        if data is None:
+            data = parse_data_file(path, stats, unmapped)
+            self.put(path, data)
+        return data
+
+    def get(self, path):
+        # Cached data for a data file, or None if it's missing or stale
+        (size, mtime) = self._stat(path)
+        row = self.db.execute(
+            "SELECT Data FROM Records WHERE Path = ? AND Size = ? AND ModTime = ?",
+            (path, size, mtime)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.db.execute(
+            "UPDATE Records SET LastUsed = ? WHERE Path = ?", (self.clock, path)
+            )
+        self._written()
+        return pickle.loads(row[0])
+
+    def put(self, path, data):
+        (size, mtime) = self._stat(path)
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        old = self.db.execute(
+            "SELECT Bytes FROM Records WHERE Path = ?", (path,)
+            ).fetchone()
+        if old is not None:
+            self.total -= old[0]
+        self.clock += 1
+        self.db.execute(
+            "INSERT OR REPLACE INTO Records VALUES (?, ?, ?, ?, ?, ?)",
+            (path, size, mtime, blob, len(blob), self.clock)
+            )
+        self.total += len(blob)
+        if self.total > self.max_size:
+            self.evict()
+        self._written()
+
+    def evict(self):
+        # Drop least recently used entries until the cache is back under 90%
+        # of its limit, so that it doesn't evict again on the next write
+        target = self.max_size * 0.9
+        cur = self.db.execute("SELECT Path, Bytes FROM Records ORDER BY LastUsed")
+        paths = list()
+        for (path, size) in cur:
+            if self.total <= target:
+                break
+            paths.append((path,))
+            self.total -= size
+        cur.close()
+        self.db.executemany("DELETE FROM Records WHERE Path = ?", paths)
+        self.commit()
+
+    def commit(self):
+        self.db.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.COMMIT_EVERY:
+            self.commit()
+
+    def _stat(self, path):
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
@@ -0,0 +1,179 @@
+"""Columnar (Arrow IPC / Parquet) export of archived items"""
+
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+# pyarrow is only needed for columnar exports
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from datafiles import FORMATS
+from mailobjects import *
+
+# Items per Parquet row group / Arrow record batch
+ROW_GROUP_SIZE = 10000
+
+# Element types of list fields, by field name, other lists are left out
+LIST_TYPES = {
+    'From': OlkRecipient,
+    'To': OlkRecipient,
+    'CC': OlkRecipient,
+    'BCC': OlkRecipient,
+    'MeetingAttendees': OlkRecipient,
+    'ActionsTaken': OlkAction,
+    'Attendees': OlkAttendee,
+    'EmailAddresses': OlkInternetAddress,
+    'IMAddresses': OlkInternetAddress,
+    'CategoryIDs': int,
+    }
+# Types data file values are decoded to, by variant type (see
+#  OlkDataFile._interpret_items), for check_annotations
+VARIANT_TYPES = {
+    0x02: int, 0x03: int, 0x14: int, 0x20: int, 0x0B: bool,
+    0x1D: str, 0x1E: str, 0x1F: str, 0x4D: datetime,
+    }
+# Fields that add_data parses itself, rather than keeping the decoded value
+PARSED_FIELDS = {
+    'OlkContact': frozenset(['Date1', 'Date2', 'Birthday', 'Anniversairy']),
+    }
+
+
+class OlkColumns:
+    """Arrow schema for an item class, and converters from its fields
+
+    Fields are typed from their annotations, dataclass fields become structs
+    and known lists (see LIST_TYPES) become lists. Fields that can't be typed
+    (dicts, payloads, etc.) are left out."""
+
+    def __init__(self, ItemClass, columns=None):
+        if pa is None:
+            raise ImportError('pyarrow is needed for columnar exports')
+        self.ItemClass = ItemClass
+        self.columns = list()
+        schema = list()
+        for f in fields(ItemClass):
+            if columns is not None and f.name not in columns:
+                continue
+            conv = self._converter(LIST_TYPES.get(f.name, f.type), f.name)
+            if conv is None:
+                continue
+            (arrow_type, fn) = conv
+            self.columns.append((f.name, fn))
+            schema.append(pa.field(f.name, arrow_type))
+        self.schema = pa.schema(schema)
+
+    def table(self, items):
+        # Build an Arrow table from a batch of items
+        data = {name: list() for name, _ in self.columns}
+        for item in items:
+            for name, fn in self.columns:
+                value = getattr(item, name)
+                data[name].append(None if value is None else fn(value))
+        return pa.Table.from_pydict(data, schema=self.schema)
+
+    def _converter(self, cls, name=None):
+        # (arrow type, conversion function) for a type, or None if it can't
+        # be stored, known lists are passed in as their element type
+        if name in LIST_TYPES:
+            conv = self._converter(cls)
+            if conv is None:
+                return None
+            (arrow_type, fn) = conv
+            return (pa.list_(arrow_type), lambda v: [fn(x) for x in v])
+        if cls is bool:
+            return (pa.bool_(), bool)
+        elif cls is int:
+            return (pa.int64(), int)
+        elif cls is float:
+            return (pa.float64(), float)
+        elif cls is str:
+            return (pa.string(), str)
+        elif cls is bytes:
+            return (pa.binary(), bytes)
+        elif cls in (datetime, date):
+            return (pa.timestamp('us', tz='UTC'), to_datetime)
+        elif is_dataclass(cls):
+            subfields = list()
+            converters = list()
+            for f in fields(cls):
+                conv = self._converter(f.type)
+                if conv is not None:
+                    subfields.append(pa.field(f.name, conv[0]))
+                    converters.append((f.name, conv[1]))
+            def to_struct(v):
+                out = dict()
+                for k, fn in converters:
+                    x = getattr(v, k)
+                    out[k] = None if x is None else fn(x)
+                return out
+            return (pa.struct(subfields), to_struct)
+        return None
+
+
+def check_annotations():
+    # (class, field, annotation, decoded types) for each item field whose
+    #  annotation doesn't match what its schema decodes it to (the variant
+    #  type, or the values of its enum), which would break its converter
+    mismatches = list()
+    for fmt in FORMATS.values():
+        ItemClass = globals().get(fmt.name)
+        if not is_dataclass(ItemClass):
+            continue
+        annotations = {f.name: f.type for f in fields(ItemClass)}
+        parsed = PARSED_FIELDS.get(fmt.name, frozenset())
+        for key, (name, raw, handler_mode, handler, skip) in fmt.fields.items():
+            if skip or raw or name in fmt.skip_indb or name in parsed:
+                continue
+            if name not in annotations:
+                continue
+            if handler_mode == 'E':
+                types = {type(v) for v in handler.values() if v is not None}
+            elif handler_mode is None and key[0] in VARIANT_TYPES:
+                types = {VARIANT_TYPES[key[0]]}
+            else:
+                continue
+            # bools and ints convert to each other
+            expected = annotations[name]
+            if expected in (bool, int):
+                expected = (bool, int)
+            if not all(issubclass(t, expected) for t in types):
+                mismatches.append((fmt.name, name, annotations[name], types))
+    return mismatches
+
+
+def to_datetime(value):
+    # All day events and tasks hold dates, store them as midnight UTC
+    if not isinstance(value, datetime):
+        return datetime.combine(value, time(), tzinfo=ZoneInfo('UTC'))
+    return value
+
+
+def write_columnar(items, ItemClass, path, format='parquet', columns=None,
+                   batch_size=ROW_GROUP_SIZE):
+    # Write items of one class to a Parquet or Arrow IPC file, a batch at a
+    # time, so only one batch is converted at once
+    # Returns the number of items written
+    cols = OlkColumns(ItemClass, columns)
+    if format == 'parquet':
+        writer = pq.ParquetWriter(path, cols.schema)
+    elif format == 'arrow':
+        writer = pa.ipc.new_file(path, cols.schema)
+    else:
+        raise ValueError('Invalid columnar format: ' + str(format))
+
+    count = 0
+    items = iter(items)
+    with writer:
+        while batch := list(islice(items, batch_size)):
+            table = cols.table(batch)
+            if format == 'parquet':
+                writer.write_table(table, row_group_size=batch_size)
+            else:
+                writer.write_table(table, max_chunksize=batch_size)
+            count += len(batch)
+    return count
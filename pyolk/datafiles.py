@@ -1,8 +1,12 @@
 """Handle reading of binary olk* data files"""
 
-from collections import defaultdict
-from struct import unpack, error
+from collections.abc import Mapping
+from contextlib import contextmanager
+from mmap import mmap, ACCESS_READ
+from struct import Struct, unpack, unpack_from, error
+from time import perf_counter
 
+from stats import OlkStats, OlkUnmappedKeys
 from utils import *
 
 ## Enums
@@ -398,530 +402,654 @@ CLASSTOSCHEMA = {
     }
 
 
+# Format dict, shared by all schemas
+#  schema is ([name], [handler_mode], [handler])
+# first part of the key is (usually) a .Net Variant Type enum
+# second part is an index unique within the variant type
+OLKDATAFILE = {
+    # integers (2 bytes signed)
+    '02:01': ('short01',), # Message; Attachment Details; Recurrence Freq
+    '02:02': ('short02',), # Attachment Details, ?
+    '02:03': ('short03',), # Attachment Details, ?
+    '02:04': ('short04',), # Attachment Details, ?
+    '02:06': ('short06',), # Message
+    '02:65': ('DefaultEmailRaw', 'rX', None), # Contact
+    '02:77': ('DefaultIMRaw', 'rX', None), # Contact
+    '02:80': ('Sensitivity', 'fE', OlSensitivity), # Message, Contact
+    '02:81': ('Priority', 'fE', OlPriority), # Message, Event
+    '02:82': ('short82',), # Event, Task
+    '02:D4': ('shortD4', 'rX', None), # Contact
+    '02:2C01': ('DownloadHeadersOnly',), # Accounts (both)
+    '02:2D01': ('SpecialFolderType',), # Folder = {1-10,12,14,99,103,106}
+    '02:2F01': ('CalendarWeekStart', 'fE', OlDayOfWeek), # Main
+    '02:3001': ('DefaultEventReminderUnit', 'fE', OlTimeUnit), # Main
+    '02:3101': ('LocaleIdentifier', 'fE', LOCALE), # Main
+    '02:3201': ('short3201', 'rX', None), # Category, always 0
+    '02:3301': ('OnlineFolderType',), # Folder = {None, 1}
+    '02:3901': ('shortCalendar1',), # Folder
+    '02:3A01': ('shortCalendar2',), # Folder
+
+    # integers (4 bytes signed)
+    '03:00': ('RecordID',),
+    '03:01': ('int01',), # Attendee Type, Recurrence Type
+    '03:02': ('int02',), # Search, always 1; Attendee
+    '03:03': ('int03',), # Main, Event My Meeting, Msg 528 vs. 36
+    '03:04': ('int04',), # Main=0/1, SearchType, MessageType
+    '03:05': ('MessageSize',), # Message, Event (always 0 for Event)
+    '03:06': ('AlarmTrigger',), # Message, Event (always 0 for Msg)
+    '03:07': ('int07',), # Event, always 0, deprecated in v16
+    '03:08': ('MonthDay',), # Recurrence
+    '03:09': ('int09',), # Search, always 2
+    '03:0A': ('int0A',), # Search, always 0
+    '03:0C': ('Response', 'fE', RESPONSE),
+    '03:0D': ('int0D',), # Main, 107 or null
+    '03:0E': ('int0E',), # Main, 105 or null; Event next reminder
+    '03:0F': ('StartDate', 'fF', dt_winminutes), # Recurrence
+    '03:10': ('int10',), # Message, Recurrence Until
+    '03:13': ('StartDateUTC', 'fF', dt_winminutes), # Event
+    '03:14': ('EndDateUTC', 'fF', dt_winminutes), # Event, Message (something else)
+    '03:15': ('int15',), # Message, 651 or null
+    '03:16': ('int16',), # Event, null or in the 1-400 range
+    '03:17': ('StartDateOrganizer', 'fF', dt_winminutes), # Event
+    '03:18': ('EndDateOrganizer', 'fF', dt_winminutes), # Event
+    '03:1A': ('int1A',), # Event: MasterRecordID; Message: DownloadState
+    '03:1D': ('BusyStatus', 'fE', OlBusyStatus), # Event
+    '03:1E': ('RecurrenceID',), # Event
+    '03:20': ('AttendeeCount',), # Event
+    '03:23': ('int23',), # Message
+    '03:24': ('int24',), # Event, null or 0, 1, 2, 3, deprecated in v16
+    '03:27': ('int27',), # Message
+    '03:29': ('ConversationID', 'rF', lambda b: unpack('<q', b)[0]),
+    '03:2A': ('int2A',), # Message, null or 0, 1
+    '03:2B': ('int2B',), # Message
+    '03:35': ('int35',), # Contact, always 0
+    '03:64': ('EmailCount',), # Contact
+    '03:76': ('IMCount',), # Contact
+    '03:80': ('intCalendar3',), # Folder
+    '03:94': ('int94',), # Contact
+    '03:9E': ('int9E',), # Contact, always 0
+    '03:E3': ('FlagStatus', 'fE', OlFlagStatus), # Message
+    '03:E4': ('EmailTypesRaw',), # Contact
+    '03:E5': ('IMTypesRaw',), # Contact
+    '03:2C01': ('ServerType', 'rF', ol_type_code), # Account (Mail)
+    '03:2E01': ('UseSignatureNewMessage',), # Account (Mail)
+    '03:2F01': ('UseSignatureReplyForward',), # Account (Mail)
+    '03:3001': ('int3001',), # Account (Exchange), 30
+    '03:3201': ('DirectoryServiceMaxResults',), # Account (Exchange)
+    '03:3701': ('int3701',), # Account (Exchange), 20
+    '03:3801': ('ExchangeServerPort',), # Accounts (both)
+    '03:3901': ('int3901',), # Account (Exchange), 25
+    '03:3A01': ('DirectoryServicePort',), # Account (Exchange)
+    '03:3D01': ('EncryptionAlgorithm', 'rF', ol_type_code), # Accounts (both)
+    '03:3E01': ('SigningAlgorithm', 'rF', ol_type_code), # Account (Exchange)
+    '03:3F01': ('int3F01',), # Account (Exchange), 2
+    '03:4701': ('int4701',), # Account (Exchange), 10
+    '03:4801': ('x-mac-type', 'rF', ol_type_code), # Attachment
+    '03:4901': ('x-mac-creator', 'rF', ol_type_code), # Attachment
+    '03:4A01': ('type4A01', 'rF', ol_type_code), # Attachment
+    '03:4B01': ('type4B01', 'rF', ol_type_code), # Attachment
+    '03:4C01': ('int4C01',), # Attachment
+    '03:4E01': ('FolderType', 'rF', ol_type_code), # Folder
+    '03:4F01': ('FolderClass', 'fE', OlFolderClass), # Folder
+    '03:5101': ('ItemCount',), # Folder
+    '03:5201': ('FolderID',), # Folder
+    '03:5401': ('CalendarDefaultTimezone',), # Main, in ms_tzid
+    '03:5501': ('CalendarWorkDayStarts',), # Main, minutes
+    '03:5601': ('CalendarWorkDayEnds',), # Main, minutes
+    '03:5701': ('DefaultEventReminderBefore',), # Main
+    '03:5801': ('int5801',), # Main, null or 1
+    '03:5901': ('int5901',), # Category, null or 0/2/6
+    '03:5A01': ('int5A01',), # Category, null or 0/1
+    '03:5B01': ('int5B01',), # Attachment, ?
+    '03:5C01': ('int5C01', 'rF', lambda b: unpack('<q', b)[0]), # Attachment, ?
+    '03:E803': ('PictureBlockID', 'rX', None), # Contact Picture
+    '03:E903': ('PictureFormat', 'rF', ol_type_code), # Contact Picture
+
+    # bstrings
+    '08:03': ('bytes03',), # Message
+    '08:04': ('bytes04',), # Message
+    '08:05': ('SearchData',), # Search
+
+    # booleans
+    '0B:02': ('bool02',), # Attendee, Country always true
+    '0B:03': ('IsRecurring',), # Event Is Recurring, Attendee
+    '0B:04': ('bool04',), # Attendee
+    '0B:05': ('Completed',), # Task
+    '0B:06': ('bool06',), # Task, always false, deprecated in v16
+    '0B:07': ('AllDayEvent',), # Event
+    '0B:08': ('HasReminder',), # Task, Message, Contact
+    '0B:09': ('bool09',), # Event
+    '0B:0A': ('bool0A',), # Event
+    '0B:0B': ('IsMyMeeting',), # Event
+    '0B:0D': ('bool0D',), # Event
+    '0B:0E': ('bool0E',), # Event
+    '0B:0F': ('bool0F',), # Event
+    '0B:10': ('Overdue',), # Task, Event
+    '0B:11': ('AllowNewTimeProposal',), # Event
+    '0B:13': ('bool13',), # Event
+    '0B:14': ('IsCancelled',), # Event
+    '0B:15': ('CanJoinOnline',), # Event
+    '0B:16': ('DoNotForward',), # Event
+    '0B:18': ('bool18',), # Event
+    '0B:1F': ('bool1F',), # Message
+    '0B:23': ('HasDownloadedExternalImages',), # Message
+    '0B:24': ('bool24',), # Message, false or null
+    '0B:25': ('bool25',), # Message, false or null
+    '0B:36': ('bool36',), # Message
+    '0B:38': ('bool38',), # Message
+    '0B:39': ('bool39',), # Message
+    '0B:3C': ('bool3C',), # Message
+    '0B:3D': ('DidReply',), # Message
+    '0B:3E': ('DidForward',), # Message
+    '0B:40': ('bool40',), # Message, false or null
+    '0B:41': ('HasAttachmentOrInline',), # Message
+    '0B:42': ('Sent',), # Message
+    '0B:4A': ('Sent2',), # Message
+    '0B:4B': ('PartiallyDownloaded',), # Message
+    '0B:4D': ('HasvCalendar',), # Message
+    '0B:50': ('SuppressAutobackfill',), # Message
+    '0B:51': ('MentionedMe',), # Message
+    '0B:52': ('bool52',), # Message
+    '0B:53': ('HasAttachment',), # Message
+    '0B:55': ('bool55',), # Message
+    '0B:E1': ('boolE1',), # Contact, always false
+    '0B:E2': ('JapaneseFormat',), # Contact
+    '0B:2C01': ('bool2C01',), # Account (Mail), true
+    '0B:2D01': ('bool2D01',), # Account (Exchange), true
+    '0B:3301': ('SignOutgoingMessages',), # Account (both)
+    '0B:3401': ('SignIncludeCertificate',), # Account (both)
+    '0B:3501': ('SignSendAsClearText',), # Account (both)
+    '0B:3601': ('EncryptOutgoingMessages',), # Accounts (both)
+    '0B:3B01': ('bool3B01',), # Account (Exchange), true
+    '0B:3C01': ('bool3C01',), # Account (Exchange), false
+    '0B:3D01': ('bool3D01',), # Account (Exchange), true
+    '0B:3F01': ('DirectoryServiceUseSSL',), # Account (Exchange)
+    '0B:4001': ('DirectoryServiceUseExchangeCreds',), # Account (Exchange)
+    '0B:5301': ('bool5301',), # Account (Exchange), false
+    '0B:5401': ('bool5401',), # Account (Exchange), false
+    '0B:5601': ('bool5601',), # Account (Exchange), true
+    '0B:5A01': ('bool5A01',), # Account (Exchange), true
+    '0B:5B01': ('bool5B01',), # Attachment, ?
+    '0B:5C01': ('bool5C01',), # Attachment, ?
+    '0B:5E01': ('bool5E01',), # Attachment, ?
+    '0B:5F01': ('bool5F01',), # Folder, false or null
+    '0B:6001': ('bool6001',), # Folder, false or null            
+    '0B:6401': ('bool6401',), # Folder
+    '0B:6501': ('ContainsPartialDwnldMsgs',), # Folder
+    '0B:6601': ('WorkOffline',), # Main
+    '0B:6701': ('bool6701',), # Main, 1/2
+    '0B:6801': ('DefaultEventReminderEnabled',), # Main
+    '0B:6901': ('PlaySoundNewMessage',), # Main
+    '0B:6A01': ('PlaySoundNoNewMessages',), # Main
+    '0B:6B01': ('PlaySoundSentMessage',), # Main
+    '0B:6C01': ('PlaySoundSyncError',), # Main
+    '0B:6D01': ('PlaySoundWelcome',), # Main
+    '0B:6E01': ('PlaySoundReminder',), # Main
+    '0B:6F01': ('CalendarWorkWeekSu',), # Main
+    '0B:7001': ('CalendarWorkWeekMo',), # Main
+    '0B:7101': ('CalendarWorkWeekTu',), # Main
+    '0B:7201': ('CalendarWorkWeekWe',), # Main
+    '0B:7301': ('CalendarWorkWeekTh',), # Main
+    '0B:7401': ('CalendarWorkWeekFr',), # Main
+    '0B:7501': ('CalendarWorkWeekSa',), # Main
+    '0B:7601': ('NotifyBounceIconInDock',), # Main
+    '0B:7801': ('ReplyWithDefaultEmailAccount',), # Main
+    '0B:7901': ('AssignMessagesToContactCategories',), # Main
+    '0B:7A01': ('NotifyDisplayAlert',), # Main
+    '0B:7B01': ('NotifyShowPreviewInAlert',), # Main
+    '0B:7C01': ('bool7C01',), # Category, 5/15
+    '0B:7D01': ('Read',), # Message
+    '0B:7E01': ('IsLocalCategory',), # Category
+    '0B:8001': ('bool8001',), # Accounts (both), true
+    '0B:8101': ('bool8101',), # Account (Mail)
+    '0B:8201': ('bool8201',), # Account (Mail)
+    '0B:8601': ('bool8601',), # Account (Mail)
+    '0B:9501': ('bool9501',), # Folder
+    '0B:9801': ('bool9801',), # Account (Mail)
+    '0B:9A01': ('SyncSharedMailboxes',), # Account (Exchange)
+    '0B:9B01': ('bool9B01',), # Folder
+    '0B:9C01': ('bool9C01',), # Account (Exchange)
+    '0B:9D01': ('bool9D01',), # Folder
+    '0B:9E01': ('bool9E01',), # Account (Exchange)
+    '0B:9F01': ('bool9F01',), # Folder
+    '0B:A101': ('boolA101',), # Folder
+    '0B:A201': ('boolA201',), # Folder
+    '0B:A301': ('boolA301',), # Folder
+    '0B:A401': ('boolA401',), # Account (Mail)
+    '0B:A501': ('boolA501',), # Account (Mail)
+
+    # data access objects - collections, lists, etc.
+    #  Recurrence, MessageSourceHeader
+    '0D:01': ('obj01',),
+    #  Events
+    '0D:02': ('RRule', 'fC', OlkRecurrence),
+    '0D:07': ('ReplyTo', 'fM', '_event_reply_to_parse'),
+    '0D:09': ('Timezone', 'fC', OlkTimezone),
+    '0D:0B': ('Attendees', 'fL', OlkAttendee),
+    '0D:0D': ('Organizer', 'fM', '_message_user_parse'),
+    '0D:0E': ('AttachmentExchangeID', 'fX', None),
+    '0D:0F': ('Timezone2', 'fC', OlkTimezone), # duplicate
+    '0D:82': ('AttachmentBlockID', 'fX', None),
+    #  Messages
+    '0D:03': ('From', 'fM', '_message_user_list_parse'),
+    '0D:04': ('From2', 'fM', '_message_user_list_parse'), # same as from
+    '0D:05': ('MsrcBlockStruct', 'fC', OlkMultipartType),
+    '0D:06': ('From3', 'fM', '_message_user_list_parse'), # same as from
+    '0D:1E': ('To', 'fM', '_message_user_list_parse'),
+    '0D:1F': ('CC', 'fM', '_message_user_list_parse'),
+    '0D:20': ('BCC', 'fM', '_message_user_list_parse'),
+    '0D:21': ('AttachmentMetadata', 'fL', OlkAttachment),
+    '0D:2D': ('MeetingAttendees', 'fM', '_message_user_list_parse'),
+    '0D:C1': ('ActionsTaken', 'fM', '_actions_taken_parse'),
+    '0D:80': tuple(),
+    #  Contacts
+    '0D:62': ('obj62',), # always 0? probably a list, but not sure of what
+    #  Attachments
+    '0D:3301': ('AttcBlockStruct', 'fC', OlkContentType),
+    '0D:3E01': ('obj3E01',),
+    #  Categories
+    '0D:3401': ('BackgroundColor', 'fF', ol_color),
+    #  Main
+    '0D:3801': tuple(),
+    '0D:3901': ('AddressFormats', 'fL', OlkAddressFormat),
+    '0D:4501': ('NewOutlookObject',), # something to do with New Outlook
+    #  Time Zone
+    '0D:3F01': ('Standard', 'fL', OlkTZProp),
+    '0D:4001': ('Daylight', 'fL', OlkTZProp),
+    #  Account (both)
+    '0D:2C01': ('Certificates',),
+    #  Account (Exchange)
+    '0D:4201': ('bplist1',),
+    '0D:4301': ('bplist2',),
+
+    # long integers (8 bytes signed)
+    '14:01': ('long01',), # Search, always 0
+    '14:61': ('long61', 'rX'), # Contact
+    '14:2C01': ('AttachmentBlockID', 'rX', None), # Attachment Block Id
+    '14:2D01': ('SyncMapBlockID', 'rX', None), # Folder SyncMap Block Id
+    '14:2E01': ('FolderSyncBlockID', 'rX', None), # Folder SyncMap Block Id
+    '14:3001': ('AccountUID',), # Event, Category
+    '14:3201': ('ExchangeAccountUID',), # Account (Mail)
+    '14:3301': ('MailAccountUID',), # Main
+    '14:3401': ('LDAPAccountUID',), # Account (Exchange)
+    '14:3601': ('ExchangeAccountUID',), # Main
+    '14:3701': ('long3701',), # Main, 55834574849
+    '14:3801': ('MailAccountUID',), # Main
+    '14:3901': ('GroupID',),
+
+    # user-defined blobs
+    #  Contact
+    '1D:66': ('EmailAddress_1',),
+    '1D:67': ('EmailAddress_2',),
+    '1D:68': ('EmailAddress_3',),
+    '1D:69': ('EmailAddress_4',),
+    '1D:6A': ('EmailAddress_5',),
+    '1D:6B': ('EmailAddress_6',),
+    '1D:6C': ('EmailAddress_7',),
+    '1D:6D': ('EmailAddress_8',),
+    '1D:6E': ('EmailAddress_9',),
+    '1D:6F': ('EmailAddress_10',),
+    '1D:70': ('EmailAddress_11',),
+    '1D:71': ('EmailAddress_12',),
+    '1D:72': ('EmailAddress_13',),
+    '1D:78': ('IMAddress_1',),
+    '1D:79': ('IMAddress_2',),
+    '1D:7A': ('IMAddress_3',),
+    '1D:7B': ('IMAddress_4',),
+    '1D:7C': ('IMAddress_5',),
+    '1D:7D': ('IMAddress_6',),
+    '1D:7E': ('IMAddress_7',),
+    '1D:7F': ('IMAddress_8',),
+    '1D:80': ('IMAddress_9',),
+    '1D:81': ('IMAddress_10',),
+    '1D:82': ('IMAddress_11',),
+    '1D:83': ('IMAddress_12',),
+    '1D:84': ('IMAddress_13',),
+
+    # ANSI strings
+    '1E:01': ('Address',), # Event, Attendee
+    '1E:02': ('MessageID',),
+    '1E:03': ('string03',), # Message.Simple?
+    '1E:04': ('string04',), # Event CalendarUID, Message Header
+    '1E:07': ('string07',), # Event, ?
+    '1E:0A': ('MessageClass',), # Event
+    '1E:1E': ('References2',), # Message, only present once, similar to references
+    '1E:1F': ('References3',), # Message, only present once, similar to references
+    '1E:22': ('InReplyTo',), # Message
+    '1E:23': ('vCalendar',), # Message
+    '1E:24': ('References',), # Message
+    '1E:25': ('string25',), # Message
+    '1E:2B': ('string2B',), # Message
+    '1E:2C': ('string2C',), # Message
+    '1E:40': ('MessageClass',), # Message
+    '1E:41': ('string41',), # Message
+    '1E:67': ('ExchangeID',),
+    '1E:68': ('ExchangeChangeKey',),
+    '1E:2C01': ('EmailAddress',), # Accounts (both)
+    '1E:2D01': ('ExchangeServerURL',), # Accounts (both)
+    '1E:3101': ('string3101',), # Account (Exchange), AAMK...AAA=
+    '1E:3401': ('string3401',), # Account (Exchange), empty
+    '1E:3501': ('directory_service_search_base',), # Account (Exchange)
+    '1E:3801': ('string3801',), # Account (Exchange), empty
+    '1E:3901': ('string3901',), # Account (Exchange), empty
+    '1E:3A01': ('EmailAddress2',), # Account (Exchange)
+    '1E:3B01': ('OutlookOABURL',), # Account (Exchange)
+    '1E:3C01': ('ReceiptIPAddress',), # Account (Exchange)
+    '1E:3E01': ('FileType',), # Attachment
+    '1E:3F01': ('ContentType',), # Attachment
+    '1E:4001': ('FileName',), # Attachment
+    '1E:4201': ('ExchangeGUID',), # Category
+    '1E:4301': ('OutlookManageURL',), # Account (both)
+    '1E:4401': ('OutlookClutterURL',),
+    '1E:4D01': ('OutlookAPIURL',), # Account (Exchange)
+    '1E:4E01': ('CalendarOwnerAccount',), # Folder
+    '1E:4F01': ('OutlookSearchURL',), # Account (Exchange)
+    '1E:5001': ('CalendarToken',), # Folder
+    '1E:5101': ('string5101',), # Attachment
+    '1E:5201': ('ExchangeEWSURL',), # Account (Exchange)
+
+    # Unicode strings (message contents, xml, etc.)
+    '1F:01': ('Name',), # Contact first name, Event body, Message subject, Search/Task/Attendee name
+    '1F:02': ('unicode02',), # Contact last name, Event subject
+    '1F:04': ('unicode04',), # Contact body, Event location
+    '1F:05': ('CalendarOwnerName',), # Event
+    '1F:06': ('HomeAddressStreet',), # Contact
+    '1F:07': ('HomeAddressCity',), # Contact
+    '1F:08': ('unicode08',), # Event conference; Country, - or ,; Contact Home Address 
+    '1F:09': ('unicode09',), # Event conference; Contact Home Address
+    '1F:0A': ('unicode0A',), # Event conference; Contact Home Address
+    '1F:0B': ('unicode0B',), # Event conference; Contact Home Phone; Task body
+    '1F:0C': ('unicode0C',), # Event conference; Contact Home Fax
+    '1F:0D': ('ConferenceSettings',), # Event conference
+    '1F:0E': ('ConferenceSettings2',), # Event conference
+    '1F:0F': ('PhoneHome2',), # Contact
+    '1F:10': ('ConferenceUUID',), # Event conference
+    '1F:14': ('Company',), # Contact
+    '1F:15': ('WorkTitle',), # Contact
+    '1F:16': ('WorkAddressStreet',), # Contact
+    '1F:17': ('WorkAddressCity',), # Contact
+    '1F:18': ('WorkAddressState',), # Contact
+    '1F:19': ('WorkAddressPostalCode',), # Contact
+    '1F:1A': ('WorkAddressCountry',), # Contact
+    '1F:1B': ('Department',), # Contact
+    '1F:1C': ('OfficeLocation',), # Contact
+    '1F:1D': ('PhoneWork',), # Contact
+    '1F:1E': ('unicode1E',), # Message body; Contact Work Fax
+    '1F:1F': ('PhonePager',), # Contact
+    '1F:20': ('WebPageWork',), # Contact
+    '1F:21': ('PhoneMobile',), # Contact
+    '1F:22': ('PhoneWork2',), # Contact
+    '1F:23': ('unicode23',), # Message Recipients; Contact Primary Phone
+    '1F:24': ('Alias',), # Contact
+    '1F:25': ('PhoneAssistant',), # Contact
+    '1F:27': ('Preview',), # Message
+    '1F:2A': ('ThreadTopic',), # Message
+    '1F:2F': ('ThreadTopic2',), # Message
+    '1F:3E': ('Nickname',), # Contact
+    '1F:3F': ('Title',), # Contact
+    '1F:40': ('Suffix',), # Contact
+    '1F:41': ('Custom1',), # Contact
+    '1F:42': ('Custom2',), # Contact
+    '1F:43': ('Custom3',), # Contact
+    '1F:44': ('Custom4',), # Contact
+    '1F:45': ('Custom5',), # Contact
+    '1F:46': ('Custom6',), # Contact
+    '1F:47': ('Custom7',), # Contact
+    '1F:48': ('Custom8',), # Contact
+    '1F:49': ('Date1',), # Contact, DOW, Mon DD, YYYY
+    '1F:4A': ('Date2',), # Contact, DOW, Mon DD, YYYY
+    '1F:4B': ('Birthday',), # Contact, DOW, Mon DD, YYYY
+    '1F:4C': ('Anniversairy',), # Contact, DOW, Mon DD, YYYY
+    '1F:57': ('YomiLastName',), # Contact
+    '1F:58': ('YomiFirstName',), # Contact
+    '1F:59': ('YomiCompanyName',), # Contact
+    '1F:5A': ('XML:Tasks',), # Event/Message; Contact Extra Phones
+    '1F:5B': ('XML:Meetings',), # Event/Message; Contact Extra Phones
+    '1F:5C': ('XML:Addresses',), # Event/Message; Contact Extra Phones
+    '1F:5D': ('XML:Emails',), # Event/Message; Contact Extra Phones
+    '1F:5E': ('XML:Phones',), # Event, Message
+    '1F:5F': ('XML:Urls',), # Event, Message
+    '1F:60': ('XML:Contacts',), # Event, Message
+    '1F:61': ('ThreadTopic',), # Event, Message
+    '1F:62': ('HTMLBody',), # Message
+    '1F:6A': ('MiddleName',), # Contact, for Message this is Card Data
+    '1F:C8': ('Spouse',), # Contact
+    '1F:C9': ('Child',), # Contact
+    '1F:D5': ('AstrologicalSign',), # Contact
+    '1F:D6': ('Age',), # Contact
+    '1F:E5': ('BloodType',), # Contact
+    '1F:E6': ('InterestsHobbies',), # Contact
+    '1F:E7': ('Initials',), # Contact
+    '1F:FA': ('HomeAddressFormat',), # Contact, Country Code
+    '1F:FB': ('WorkAddressFormat',), # Contact, Country Code
+    '1F:FD': ('PhoneOther',), # Contact
+    '1F:FE': ('PhoneOtherFax',), # Contact
+    '1F:FF': ('PhoneRadio',), # Contact
+    '1F:0001': ('OtherAddressStreet',), # Contact
+    '1F:0101': ('OtherAddressCity',), # Contact
+    '1F:0201': ('OtherAddressState',), # Contact
+    '1F:0301': ('OtherAddressPostalCode',), # Contact
+    '1F:0401': ('OtherAddressCountry',), # Contact
+    '1F:0601': ('OtherAddressFormat',), # Contact, Seems bugged in Outlook 16 
+    '1F:2C01': ('DisplayName',), # Accounts (both)
+    '1F:2E01': ('UserName',), # Accounts (Mail)
+    '1F:2F01': ('EmailAddressUnicode',), # Accounts (both), same as string email address
+    '1F:3101': ('unicode3101',), # Account (Exchange), null or empty
+    '1F:3401': ('FileNameUnicode',), # Attachment
+    '1F:3501': ('Name',), # Category
+    '1F:3601': ('Name',), # Folder
+    '1F:3701': ('Title',), # Note
+    '1F:3801': ('Body',), # Note
+    '1F:3901': ('Name',), # Signature
+    '1F:3A01': ('Body',), # Signature
+    '1F:3B01': ('SoundSet',), # Main
+    '1F:3C01': ('DefaultCategory',), # Accounts (Exchange)
+    '1F:4401': ('unicode4401',), # Attachment
+    '1F:4C01': ('CalendarOwnerName',), # Folder
+
+    # additional long codes
+    #   14 == max(15.values()) except for a few Messages
+    #   Mostly 1, but can be up to 15
+    #   16 is not always present, always zero except for a few Messages
+    #   Can be 1, 4, or 5 when non-zero
+    '20:14': ('foot14',),
+    '20:15': ('foot15', 'rF', lambda b: OlkDataFile._read_sizes(b, 'q')),
+    '20:16': ('foot16',),
+
+    # GUIDs for a class (CLSID)
+    '48:00': ('UUID',), # Category, Contact, Event, Note, Task
+
+    # Apple Mac Absolute timestamps (seconds since Jan 1 2001)
+    '4D:01': ('TimeSent',),
+    '4D:02': ('TimeReceived',),
+    '4D:04': ('ModDate',),
+    '4D:09': ('StartDate',), # Task
+    '4D:0A': ('CompletedDate',), # Task
+    '4D:0B': ('DueDate',), # Task
+    '4D:0C': ('Reminder',), # Task
+    '4D:0D': ('Reminder2',), # Task, same as reminder 
+    '4D:10': ('DownloadDate2',), # Event, sent by me, same as 11
+    '4D:11': ('DownloadDate',),
+    '4D:12': ('CreationTime',),
+    '4D:15': ('date15',), # Message, off from Received by ~seconds
+    '4D:16': ('DismissTime',), # Event
+    '4D:17': ('ReplyTime',), # Event
+    '4D:18': ('OwnerCriticalChange',), # Event
+    '4D:19': ('date19',), # Event
+    '4D:1A': ('date1A',), # Message, similar to date15?
+    '4D:1B': ('ScheduledSendDate',), # Message
+    '4D:2C01': ('date2C01',), # Account (Exchange), 2016-08-27
+    '4D:2D01': ('date2D01',), # Account (Exchange)
+    '4D:2E01': ('date2E01',), # Folder, ?
+    '4D:2F01': ('date2F01',), # Folder, ?
+    '4D:3001': ('date3001',), # Folder
+    '4D:3101': ('CreatedDate',), # Note
+    '4D:3201': ('CreatedDate',), # Account (Exchange)
+    '4D:3301': ('CreatedDate',), # Category
+    '4D:3401': ('date3401',), # Category, null except one
+    '4D:3501': ('date3501',), # Category, always null
+    '4D:3601': ('date3601',), # Category, always null
+    '4D:3701': ('date3701',), # Category, always null
+    '4D:3801': ('date3801',), # Category, always null
+    '4D:3901': ('date3901',), # Category, always null
+    '4D:3A01': ('date3A01',), # Account (Exchange), 2016-08-27
+    '4D:3D01': ('date3D01',), # Account (Mail)
+
+    # TZPROP attributes
+    '4643:7A74': ('TZID', 'rF', lambda b: b.decode()),
+    '5A54:4449': ('MSTZID', 'rF', lambda b: unpack('<i', b)[0]),
+    '614E:656D': ('TZLongName', 'rF', lambda b: b.decode()),
+    # 7453 -> STANDARD time property
+    '7453:6C52': ('RRule', 'rF', lambda b: b.decode()),
+    '7453:6F54': ('OffsetTo', 'rF', lambda b: b.decode()),
+    '7453:7246': ('OffsetFrom', 'rF', lambda b: b.decode()),
+    '7453:7453': ('StartDate', 'rF', lambda b: dt_winminutes(unpack('<i', b)[0])),
+    # 4C44 -> DAYLIGHT time property
+    '4C44:6C52': ('RRule', 'rF', lambda b: b.decode()),
+    '4C44:6F54': ('OffsetTo', 'rF', lambda b: b.decode()),
+    '4C44:7246': ('OffsetFrom', 'rF', lambda b: b.decode()),
+    '4C44:7453': ('StartDate', 'rF', lambda b: dt_winminutes(unpack('<i', b)[0])),
+    }
+
+
+def parse_data_file(path, stats=None, unmapped=None, fields=None,
+                    deferred=None):
+    # Parse a data file and return its data, module-level so it can be sent
+    # to worker processes
+    return OlkDataFile(path, stats, unmapped, fields, deferred).data()
+
+
+def parse_data_file_worker(path, stats=False, fields=None, deferred=None):
+    # Parse a data file in a worker process, returning its data along with
+    # its unmapped keys and (optionally) stats, to be merged into the reader's
+    stats = OlkStats() if stats else None
+    unmapped = OlkUnmappedKeys()
+    data = parse_data_file(path, stats, unmapped, fields, deferred)
+    return data, stats, unmapped or None
+
+
+class OlkBlock(Mapping):
+    """Olk block file that's only parsed once its contents are needed"""
+
+    def __init__(self, path, stats=None, unmapped=None):
+        self.path = path
+        # the reader's stats and unmapped keys, recorded to when it's parsed
+        self.stats = stats
+        self.unmapped = unmapped
+        self._block_type = None
+        self._data = None
+
+    def __getitem__(self, key):
+        # The block type can be read from the header without parsing
+        if key == 'BlockType' and self._data is None:
+            return self.block_type()
+        return self.data()[key]
+
+    def __iter__(self):
+        return iter(self.data())
+
+    def __len__(self):
+        return len(self.data())
+
+    def block_type(self):
+        if self._block_type is None:
+            with open(self.path, 'rb') as f:
+                head = f.read(36)
+            # magic bytes, ?, entity/block, BlockID, then BlockType
+            if unpack('<i', head[8:12])[0] != 2:
+                return self.data()['BlockType']
+            self._block_type = ol_type_code(head[32:36])
+        return self._block_type
+
+    def data(self):
+        if self._data is None:
+            self._data = parse_data_file(self.path, self.stats, self.unmapped)
+        return self._data
+
+
+class OlkPayload:
+    """Lazy view of a block's file data, only read when it's needed"""
+
+    def __init__(self, path, offset, size, encoding=None):
+        self.path = path
+        self.offset = offset
+        self.size = size
+        self.encoding = encoding
+
+    def __repr__(self):
+        return 'OlkPayload({!r}, offset={}, size={})'.format(
+            self.path, self.offset, self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __bytes__(self):
+        with self.view() as view:
+            return view.tobytes()
+
+    def __str__(self):
+        # Binary payloads aren't decoded
+        if self.encoding is None:
+            return repr(self)
+        with self.view() as view:
+            return str(view, self.encoding)
+
+    @contextmanager
+    def view(self):
+        # Memory-mapped view of the payload, only valid inside the context
+        with open(self.path, 'rb') as f, \
+                mmap(f.fileno(), 0, access=ACCESS_READ) as buff:
+            with memoryview(buff)[self.offset:self.offset + self.size] as view:
+                yield view
+
+
 class OlkDataFile:
     """Class for parsing Olk binary data files"""
+    # Decode collections with the decoders compiled for each schema, rather
+    #  than interpreting the schema field by field
+    COMPILED = True
 
-    def __init__(self, path):
-        self.skip_indb = ['RecordID', 'ItemID']
-        self._initialize_format_dicts()
+    def __init__(self, path, stats=None, unmapped=None, fields=None,
+                 deferred=None):
+        self.skip_indb = SKIP_INDB
         self.path = path
-
-        # read and parse datafile
-        self.parts = self._parse(open(path, 'rb'))
+        # only parse these fields of an entity's main collection, if given
+        self.fields = None if fields is None else frozenset(fields)
+        # text fields of the main collection to leave in the file as
+        #  OlkPayloads, only decoded when they're read (True for
+        #  DEFERRED_FIELDS), along with the offset and size of each field
+        if deferred is True:
+            deferred = DEFERRED_FIELDS
+        self.deferred = frozenset(deferred or tuple())
+        self.offsets = dict()
+        # optional OlkStats, only recorded to when one is passed in
+        self.stats = stats
+        # keys missing from the schemas are counted here, rather than logged
+        #  for every file they're in
+        self.unmapped = OlkUnmappedKeys() if unmapped is None else unmapped
+
+        # map and parse datafile, the map is closed once parsing is done so
+        #  nothing returned can refer to it
+        # without a path, the parser is only used for parse_collection
+        if path is None:
+            self.parts = dict()
+            return
+        if stats is None:
+            with open(path, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as buff:
+                self.parts = self._parse(buff)
+            return
+        with stats.timer('parse'):
+            with open(path, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as buff:
+                stats.bytes_read += len(buff)
+                self.parts = self._parse(buff)
 
     def data(self):
         return {k: v for k, v in self.parts.items() if k not in self.skip_indb}
 
-    def _initialize_format_dicts(self):
-        # Initialize format dict for each section
-        #  schema is ([name], [handler_mode], [handler])
-        # sub-section format dicts are first, primary format dict is last
-        # first part of the key is (usually) a .Net Variant Type enum
-        # second part is an index unique within the variant type
-        self.OLKDATAFILE = {
-            # integers (2 bytes signed)
-            '02:01': ('short01',), # Message; Attachment Details; Recurrence Freq
-            '02:02': ('short02',), # Attachment Details, ?
-            '02:03': ('short03',), # Attachment Details, ?
-            '02:04': ('short04',), # Attachment Details, ?
-            '02:06': ('short06',), # Message
-            '02:65': ('DefaultEmailRaw', 'rX', None), # Contact
-            '02:77': ('DefaultIMRaw', 'rX', None), # Contact
-            '02:80': ('Sensitivity', 'fE', OlSensitivity), # Message, Contact
-            '02:81': ('Priority', 'fE', OlPriority), # Message, Event
-            '02:82': ('short82',), # Event, Task
-            '02:D4': ('shortD4', 'rX', None), # Contact
-            '02:2C01': ('DownloadHeadersOnly',), # Accounts (both)
-            '02:2D01': ('SpecialFolderType',), # Folder = {1-10,12,14,99,103,106}
-            '02:2F01': ('CalendarWeekStart', 'fE', OlDayOfWeek), # Main
-            '02:3001': ('DefaultEventReminderUnit', 'fE', OlTimeUnit), # Main
-            '02:3101': ('LocaleIdentifier', 'fE', LOCALE), # Main
-            '02:3201': ('short3201', 'rX', None), # Category, always 0
-            '02:3301': ('OnlineFolderType',), # Folder = {None, 1}
-            '02:3901': ('shortCalendar1',), # Folder
-            '02:3A01': ('shortCalendar2',), # Folder
-
-            # integers (4 bytes signed)
-            '03:00': ('RecordID',),
-            '03:01': ('int01',), # Attendee Type, Recurrence Type
-            '03:02': ('int02',), # Search, always 1; Attendee
-            '03:03': ('int03',), # Main, Event My Meeting, Msg 528 vs. 36
-            '03:04': ('int04',), # Main=0/1, SearchType, MessageType
-            '03:05': ('MessageSize',), # Message, Event (always 0 for Event)
-            '03:06': ('AlarmTrigger',), # Message, Event (always 0 for Msg)
-            '03:07': ('int07',), # Event, always 0, deprecated in v16
-            '03:08': ('MonthDay',), # Recurrence
-            '03:09': ('int09',), # Search, always 2
-            '03:0A': ('int0A',), # Search, always 0
-            '03:0C': ('Response', 'fE', RESPONSE),
-            '03:0D': ('int0D',), # Main, 107 or null
-            '03:0E': ('int0E',), # Main, 105 or null; Event next reminder
-            '03:0F': ('StartDate', 'fF', dt_winminutes), # Recurrence
-            '03:10': ('int10',), # Message, Recurrence Until
-            '03:13': ('StartDateUTC', 'fF', dt_winminutes), # Event
-            '03:14': ('EndDateUTC', 'fF', dt_winminutes), # Event, Message (something else)
-            '03:15': ('int15',), # Message, 651 or null
-            '03:16': ('int16',), # Event, null or in the 1-400 range
-            '03:17': ('StartDateOrganizer', 'fF', dt_winminutes), # Event
-            '03:18': ('EndDateOrganizer', 'fF', dt_winminutes), # Event
-            '03:1A': ('int1A',), # Event: MasterRecordID; Message: DownloadState
-            '03:1D': ('BusyStatus', 'fE', OlBusyStatus), # Event
-            '03:1E': ('RecurrenceID',), # Event
-            '03:20': ('AttendeeCount',), # Event
-            '03:23': ('int23',), # Message
-            '03:24': ('int24',), # Event, null or 0, 1, 2, 3, deprecated in v16
-            '03:27': ('int27',), # Message
-            '03:29': ('ConversationID', 'rF', lambda b: unpack('<q', b)[0]),
-            '03:2A': ('int2A',), # Message, null or 0, 1
-            '03:2B': ('int2B',), # Message
-            '03:35': ('int35',), # Contact, always 0
-            '03:64': ('EmailCount',), # Contact
-            '03:76': ('IMCount',), # Contact
-            '03:80': ('intCalendar3',), # Folder
-            '03:94': ('int94',), # Contact
-            '03:9E': ('int9E',), # Contact, always 0
-            '03:E3': ('FlagStatus', 'fE', OlFlagStatus), # Message
-            '03:E4': ('EmailTypesRaw',), # Contact
-            '03:E5': ('IMTypesRaw',), # Contact
-            '03:2C01': ('ServerType', 'rF', ol_type_code), # Account (Mail)
-            '03:2E01': ('UseSignatureNewMessage',), # Account (Mail)
-            '03:2F01': ('UseSignatureReplyForward',), # Account (Mail)
-            '03:3001': ('int3001',), # Account (Exchange), 30
-            '03:3201': ('DirectoryServiceMaxResults',), # Account (Exchange)
-            '03:3701': ('int3701',), # Account (Exchange), 20
-            '03:3801': ('ExchangeServerPort',), # Accounts (both)
-            '03:3901': ('int3901',), # Account (Exchange), 25
-            '03:3A01': ('DirectoryServicePort',), # Account (Exchange)
-            '03:3D01': ('EncryptionAlgorithm', 'rF', ol_type_code), # Accounts (both)
-            '03:3E01': ('SigningAlgorithm', 'rF', ol_type_code), # Account (Exchange)
-            '03:3F01': ('int3F01',), # Account (Exchange), 2
-            '03:4701': ('int4701',), # Account (Exchange), 10
-            '03:4801': ('x-mac-type', 'rF', ol_type_code), # Attachment
-            '03:4901': ('x-mac-creator', 'rF', ol_type_code), # Attachment
-            '03:4A01': ('type4A01', 'rF', ol_type_code), # Attachment
-            '03:4B01': ('type4B01', 'rF', ol_type_code), # Attachment
-            '03:4C01': ('int4C01',), # Attachment
-            '03:4E01': ('FolderType', 'rF', ol_type_code), # Folder
-            '03:4F01': ('FolderClass', 'fE', OlFolderClass), # Folder
-            '03:5101': ('ItemCount',), # Folder
-            '03:5201': ('FolderID',), # Folder
-            '03:5401': ('CalendarDefaultTimezone',), # Main, in ms_tzid
-            '03:5501': ('CalendarWorkDayStarts',), # Main, minutes
-            '03:5601': ('CalendarWorkDayEnds',), # Main, minutes
-            '03:5701': ('DefaultEventReminderBefore',), # Main
-            '03:5801': ('int5801',), # Main, null or 1
-            '03:5901': ('int5901',), # Category, null or 0/2/6
-            '03:5A01': ('int5A01',), # Category, null or 0/1
-            '03:5B01': ('int5B01',), # Attachment, ?
-            '03:5C01': ('int5C01', 'rF', lambda b: unpack('<q', b)[0]), # Attachment, ?
-            '03:E803': ('PictureBlockID', 'rX', None), # Contact Picture
-            '03:E903': ('PictureFormat', 'rF', ol_type_code), # Contact Picture
-
-            # bstrings
-            '08:03': ('bytes03',), # Message
-            '08:04': ('bytes04',), # Message
-            '08:05': ('SearchData',), # Search
-
-            # booleans
-            '0B:02': ('bool02',), # Attendee, Country always true
-            '0B:03': ('IsRecurring',), # Event Is Recurring, Attendee
-            '0B:04': ('bool04',), # Attendee
-            '0B:05': ('Completed',), # Task
-            '0B:06': ('bool06',), # Task, always false, deprecated in v16
-            '0B:07': ('AllDayEvent',), # Event
-            '0B:08': ('HasReminder',), # Task, Message, Contact
-            '0B:09': ('bool09',), # Event
-            '0B:0A': ('bool0A',), # Event
-            '0B:0B': ('IsMyMeeting',), # Event
-            '0B:0D': ('bool0D',), # Event
-            '0B:0E': ('bool0E',), # Event
-            '0B:0F': ('bool0F',), # Event
-            '0B:10': ('Overdue',), # Task, Event
-            '0B:11': ('AllowNewTimeProposal',), # Event
-            '0B:13': ('bool13',), # Event
-            '0B:14': ('IsCancelled',), # Event
-            '0B:15': ('CanJoinOnline',), # Event
-            '0B:16': ('DoNotForward',), # Event
-            '0B:18': ('bool18',), # Event
-            '0B:1F': ('bool1F',), # Message
-            '0B:23': ('HasDownloadedExternalImages',), # Message
-            '0B:24': ('bool24',), # Message, false or null
-            '0B:25': ('bool25',), # Message, false or null
-            '0B:36': ('bool36',), # Message
-            '0B:38': ('bool38',), # Message
-            '0B:39': ('bool39',), # Message
-            '0B:3C': ('bool3C',), # Message
-            '0B:3D': ('DidReply',), # Message
-            '0B:3E': ('DidForward',), # Message
-            '0B:40': ('bool40',), # Message, false or null
-            '0B:41': ('HasAttachmentOrInline',), # Message
-            '0B:42': ('Sent',), # Message
-            '0B:4A': ('Sent2',), # Message
-            '0B:4B': ('PartiallyDownloaded',), # Message
-            '0B:4D': ('HasvCalendar',), # Message
-            '0B:50': ('SuppressAutobackfill',), # Message
-            '0B:51': ('MentionedMe',), # Message
-            '0B:52': ('bool52',), # Message
-            '0B:53': ('HasAttachment',), # Message
-            '0B:55': ('bool55',), # Message
-            '0B:E1': ('boolE1',), # Contact, always false
-            '0B:E2': ('JapaneseFormat',), # Contact
-            '0B:2C01': ('bool2C01',), # Account (Mail), true
-            '0B:2D01': ('bool2D01',), # Account (Exchange), true
-            '0B:3301': ('SignOutgoingMessages',), # Account (both)
-            '0B:3401': ('SignIncludeCertificate',), # Account (both)
-            '0B:3501': ('SignSendAsClearText',), # Account (both)
-            '0B:3601': ('EncryptOutgoingMessages',), # Accounts (both)
-            '0B:3B01': ('bool3B01',), # Account (Exchange), true
-            '0B:3C01': ('bool3C01',), # Account (Exchange), false
-            '0B:3D01': ('bool3D01',), # Account (Exchange), true
-            '0B:3F01': ('DirectoryServiceUseSSL',), # Account (Exchange)
-            '0B:4001': ('DirectoryServiceUseExchangeCreds',), # Account (Exchange)
-            '0B:5301': ('bool5301',), # Account (Exchange), false
-            '0B:5401': ('bool5401',), # Account (Exchange), false
-            '0B:5601': ('bool5601',), # Account (Exchange), true
-            '0B:5A01': ('bool5A01',), # Account (Exchange), true
-            '0B:5B01': ('bool5B01',), # Attachment, ?
-            '0B:5C01': ('bool5C01',), # Attachment, ?
-            '0B:5E01': ('bool5E01',), # Attachment, ?
-            '0B:5F01': ('bool5F01',), # Folder, false or null
-            '0B:6001': ('bool6001',), # Folder, false or null            
-            '0B:6401': ('bool6401',), # Folder
-            '0B:6501': ('ContainsPartialDwnldMsgs',), # Folder
-            '0B:6601': ('WorkOffline',), # Main
-            '0B:6701': ('bool6701',), # Main, 1/2
-            '0B:6801': ('DefaultEventReminderEnabled',), # Main
-            '0B:6901': ('PlaySoundNewMessage',), # Main
-            '0B:6A01': ('PlaySoundNoNewMessages',), # Main
-            '0B:6B01': ('PlaySoundSentMessage',), # Main
-            '0B:6C01': ('PlaySoundSyncError',), # Main
-            '0B:6D01': ('PlaySoundWelcome',), # Main
-            '0B:6E01': ('PlaySoundReminder',), # Main
-            '0B:6F01': ('CalendarWorkWeekSu',), # Main
-            '0B:7001': ('CalendarWorkWeekMo',), # Main
-            '0B:7101': ('CalendarWorkWeekTu',), # Main
-            '0B:7201': ('CalendarWorkWeekWe',), # Main
-            '0B:7301': ('CalendarWorkWeekTh',), # Main
-            '0B:7401': ('CalendarWorkWeekFr',), # Main
-            '0B:7501': ('CalendarWorkWeekSa',), # Main
-            '0B:7601': ('NotifyBounceIconInDock',), # Main
-            '0B:7801': ('ReplyWithDefaultEmailAccount',), # Main
-            '0B:7901': ('AssignMessagesToContactCategories',), # Main
-            '0B:7A01': ('NotifyDisplayAlert',), # Main
-            '0B:7B01': ('NotifyShowPreviewInAlert',), # Main
-            '0B:7C01': ('bool7C01',), # Category, 5/15
-            '0B:7D01': ('Read',), # Message
-            '0B:7E01': ('IsLocalCategory',), # Category
-            '0B:8001': ('bool8001',), # Accounts (both), true
-            '0B:8101': ('bool8101',), # Account (Mail)
-            '0B:8201': ('bool8201',), # Account (Mail)
-            '0B:8601': ('bool8601',), # Account (Mail)
-            '0B:9501': ('bool9501',), # Folder
-            '0B:9801': ('bool9801',), # Account (Mail)
-            '0B:9A01': ('SyncSharedMailboxes',), # Account (Exchange)
-            '0B:9B01': ('bool9B01',), # Folder
-            '0B:9C01': ('bool9C01',), # Account (Exchange)
-            '0B:9D01': ('bool9D01',), # Folder
-            '0B:9E01': ('bool9E01',), # Account (Exchange)
-            '0B:9F01': ('bool9F01',), # Folder
-            '0B:A101': ('boolA101',), # Folder
-            '0B:A201': ('boolA201',), # Folder
-            '0B:A301': ('boolA301',), # Folder
-            '0B:A401': ('boolA401',), # Account (Mail)
-            '0B:A501': ('boolA501',), # Account (Mail)
-
-            # data access objects - collections, lists, etc.
-            #  Recurrence, MessageSourceHeader
-            '0D:01': ('obj01',),
-            #  Events
-            '0D:02': ('RRule', 'fC', OlkRecurrence),
-            '0D:07': ('ReplyTo', 'fF', self._event_reply_to_parse),
-            '0D:09': ('Timezone', 'fC', OlkTimezone),
-            '0D:0B': ('Attendees', 'fL', OlkAttendee),
-            '0D:0D': ('Organizer', 'fF', self._message_user_parse),
-            '0D:0E': ('AttachmentExchangeID', 'fX', None),
-            '0D:0F': ('Timezone2', 'fC', OlkTimezone), # duplicate
-            '0D:82': ('AttachmentBlockID', 'fX', None),
-            #  Messages
-            '0D:03': ('From', 'fF', self._message_user_list_parse),
-            '0D:04': ('From2', 'fF', self._message_user_list_parse), # same as from
-            '0D:05': ('MsrcBlockStruct', 'fC', OlkMultipartType),
-            '0D:06': ('From3', 'fF', self._message_user_list_parse), # same as from
-            '0D:1E': ('To', 'fF', self._message_user_list_parse),
-            '0D:1F': ('CC', 'fF', self._message_user_list_parse),
-            '0D:20': ('BCC', 'fF', self._message_user_list_parse),
-            '0D:21': ('AttachmentMetadata', 'fL', OlkAttachment),
-            '0D:2D': ('MeetingAttendees', 'fF', self._message_user_list_parse),
-            '0D:C1': ('ActionsTaken', 'fF', self._actions_taken_parse),
-            '0D:80': tuple(),
-            #  Contacts
-            '0D:62': ('obj62',), # always 0? probably a list, but not sure of what
-            #  Attachments
-            '0D:3301': ('AttcBlockStruct', 'fC', OlkContentType),
-            '0D:3E01': ('obj3E01',),
-            #  Categories
-            '0D:3401': ('BackgroundColor', 'fF', ol_color),
-            #  Main
-            '0D:3801': tuple(),
-            '0D:3901': ('AddressFormats', 'fL', OlkAddressFormat),
-            '0D:4501': ('NewOutlookObject',), # something to do with New Outlook
-            #  Time Zone
-            '0D:3F01': ('Standard', 'fL', OlkTZProp),
-            '0D:4001': ('Daylight', 'fL', OlkTZProp),
-            #  Account (both)
-            '0D:2C01': ('Certificates',),
-            #  Account (Exchange)
-            '0D:4201': ('bplist1',),
-            '0D:4301': ('bplist2',),
-
-            # long integers (8 bytes signed)
-            '14:01': ('long01',), # Search, always 0
-            '14:61': ('long61', 'rX'), # Contact
-            '14:2C01': ('AttachmentBlockID', 'rX', None), # Attachment Block Id
-            '14:2D01': ('SyncMapBlockID', 'rX', None), # Folder SyncMap Block Id
-            '14:2E01': ('FolderSyncBlockID', 'rX', None), # Folder SyncMap Block Id
-            '14:3001': ('AccountUID',), # Event, Category
-            '14:3201': ('ExchangeAccountUID',), # Account (Mail)
-            '14:3301': ('MailAccountUID',), # Main
-            '14:3401': ('LDAPAccountUID',), # Account (Exchange)
-            '14:3601': ('ExchangeAccountUID',), # Main
-            '14:3701': ('long3701',), # Main, 55834574849
-            '14:3801': ('MailAccountUID',), # Main
-            '14:3901': ('GroupID',),
-
-            # user-defined blobs
-            #  Contact
-            '1D:66': ('EmailAddress_1',),
-            '1D:67': ('EmailAddress_2',),
-            '1D:68': ('EmailAddress_3',),
-            '1D:69': ('EmailAddress_4',),
-            '1D:6A': ('EmailAddress_5',),
-            '1D:6B': ('EmailAddress_6',),
-            '1D:6C': ('EmailAddress_7',),
-            '1D:6D': ('EmailAddress_8',),
-            '1D:6E': ('EmailAddress_9',),
-            '1D:6F': ('EmailAddress_10',),
-            '1D:70': ('EmailAddress_11',),
-            '1D:71': ('EmailAddress_12',),
-            '1D:72': ('EmailAddress_13',),
-            '1D:78': ('IMAddress_1',),
-            '1D:79': ('IMAddress_2',),
-            '1D:7A': ('IMAddress_3',),
-            '1D:7B': ('IMAddress_4',),
-            '1D:7C': ('IMAddress_5',),
-            '1D:7D': ('IMAddress_6',),
-            '1D:7E': ('IMAddress_7',),
-            '1D:7F': ('IMAddress_8',),
-            '1D:80': ('IMAddress_9',),
-            '1D:81': ('IMAddress_10',),
-            '1D:82': ('IMAddress_11',),
-            '1D:83': ('IMAddress_12',),
-            '1D:84': ('IMAddress_13',),
-
-            # ANSI strings
-            '1E:01': ('Address',), # Event, Attendee
-            '1E:02': ('MessageID',),
-            '1E:03': ('string03',), # Message.Simple?
-            '1E:04': ('string04',), # Event CalendarUID, Message Header
-            '1E:07': ('string07',), # Event, ?
-            '1E:0A': ('MessageClass',), # Event
-            '1E:1E': ('References2',), # Message, only present once, similar to references
-            '1E:1F': ('References3',), # Message, only present once, similar to references
-            '1E:22': ('InReplyTo',), # Message
-            '1E:23': ('vCalendar',), # Message
-            '1E:24': ('References',), # Message
-            '1E:25': ('string25',), # Message
-            '1E:2B': ('string2B',), # Message
-            '1E:2C': ('string2C',), # Message
-            '1E:40': ('MessageClass',), # Message
-            '1E:41': ('string41',), # Message
-            '1E:67': ('ExchangeID',),
-            '1E:68': ('ExchangeChangeKey',),
-            '1E:2C01': ('EmailAddress',), # Accounts (both)
-            '1E:2D01': ('ExchangeServerURL',), # Accounts (both)
-            '1E:3101': ('string3101',), # Account (Exchange), AAMK...AAA=
-            '1E:3401': ('string3401',), # Account (Exchange), empty
-            '1E:3501': ('directory_service_search_base',), # Account (Exchange)
-            '1E:3801': ('string3801',), # Account (Exchange), empty
-            '1E:3901': ('string3901',), # Account (Exchange), empty
-            '1E:3A01': ('EmailAddress2',), # Account (Exchange)
-            '1E:3B01': ('OutlookOABURL',), # Account (Exchange)
-            '1E:3C01': ('ReceiptIPAddress',), # Account (Exchange)
-            '1E:3E01': ('FileType',), # Attachment
-            '1E:3F01': ('ContentType',), # Attachment
-            '1E:4001': ('FileName',), # Attachment
-            '1E:4201': ('ExchangeGUID',), # Category
-            '1E:4301': ('OutlookManageURL',), # Account (both)
-            '1E:4401': ('OutlookClutterURL',),
-            '1E:4D01': ('OutlookAPIURL',), # Account (Exchange)
-            '1E:4E01': ('CalendarOwnerAccount',), # Folder
-            '1E:4F01': ('OutlookSearchURL',), # Account (Exchange)
-            '1E:5001': ('CalendarToken',), # Folder
-            '1E:5101': ('string5101',), # Attachment
-            '1E:5201': ('ExchangeEWSURL',), # Account (Exchange)
-
-            # Unicode strings (message contents, xml, etc.)
-            '1F:01': ('Name',), # Contact first name, Event body, Message subject, Search/Task/Attendee name
-            '1F:02': ('unicode02',), # Contact last name, Event subject
-            '1F:04': ('unicode04',), # Contact body, Event location
-            '1F:05': ('CalendarOwnerName',), # Event
-            '1F:06': ('HomeAddressStreet',), # Contact
-            '1F:07': ('HomeAddressCity',), # Contact
-            '1F:08': ('unicode08',), # Event conference; Country, - or ,; Contact Home Address 
-            '1F:09': ('unicode09',), # Event conference; Contact Home Address
-            '1F:0A': ('unicode0A',), # Event conference; Contact Home Address
-            '1F:0B': ('unicode0B',), # Event conference; Contact Home Phone; Task body
-            '1F:0C': ('unicode0C',), # Event conference; Contact Home Fax
-            '1F:0D': ('ConferenceSettings',), # Event conference
-            '1F:0E': ('ConferenceSettings2',), # Event conference
-            '1F:0F': ('PhoneHome2',), # Contact
-            '1F:10': ('ConferenceUUID',), # Event conference
-            '1F:14': ('Company',), # Contact
-            '1F:15': ('WorkTitle',), # Contact
-            '1F:16': ('WorkAddressStreet',), # Contact
-            '1F:17': ('WorkAddressCity',), # Contact
-            '1F:18': ('WorkAddressState',), # Contact
-            '1F:19': ('WorkAddressPostalCode',), # Contact
-            '1F:1A': ('WorkAddressCountry',), # Contact
-            '1F:1B': ('Department',), # Contact
-            '1F:1C': ('OfficeLocation',), # Contact
-            '1F:1D': ('PhoneWork',), # Contact
-            '1F:1E': ('unicode1E',), # Message body; Contact Work Fax
-            '1F:1F': ('PhonePager',), # Contact
-            '1F:20': ('WebPageWork',), # Contact
-            '1F:21': ('PhoneMobile',), # Contact
-            '1F:22': ('PhoneWork2',), # Contact
-            '1F:23': ('unicode23',), # Message Recipients; Contact Primary Phone
-            '1F:24': ('Alias',), # Contact
-            '1F:25': ('PhoneAssistant',), # Contact
-            '1F:27': ('Preview',), # Message
-            '1F:2A': ('ThreadTopic',), # Message
-            '1F:2F': ('ThreadTopic2',), # Message
-            '1F:3E': ('Nickname',), # Contact
-            '1F:3F': ('Title',), # Contact
-            '1F:40': ('Suffix',), # Contact
-            '1F:41': ('Custom1',), # Contact
-            '1F:42': ('Custom2',), # Contact
-            '1F:43': ('Custom3',), # Contact
-            '1F:44': ('Custom4',), # Contact
-            '1F:45': ('Custom5',), # Contact
-            '1F:46': ('Custom6',), # Contact
-            '1F:47': ('Custom7',), # Contact
-            '1F:48': ('Custom8',), # Contact
-            '1F:49': ('Date1',), # Contact, DOW, Mon DD, YYYY
-            '1F:4A': ('Date2',), # Contact, DOW, Mon DD, YYYY
-            '1F:4B': ('Birthday',), # Contact, DOW, Mon DD, YYYY
-            '1F:4C': ('Anniversairy',), # Contact, DOW, Mon DD, YYYY
-            '1F:57': ('YomiLastName',), # Contact
-            '1F:58': ('YomiFirstName',), # Contact
-            '1F:59': ('YomiCompanyName',), # Contact
-            '1F:5A': ('XML:Tasks',), # Event/Message; Contact Extra Phones
-            '1F:5B': ('XML:Meetings',), # Event/Message; Contact Extra Phones
-            '1F:5C': ('XML:Addresses',), # Event/Message; Contact Extra Phones
-            '1F:5D': ('XML:Emails',), # Event/Message; Contact Extra Phones
-            '1F:5E': ('XML:Phones',), # Event, Message
-            '1F:5F': ('XML:Urls',), # Event, Message
-            '1F:60': ('XML:Contacts',), # Event, Message
-            '1F:61': ('ThreadTopic',), # Event, Message
-            '1F:62': ('HTMLBody',), # Message
-            '1F:6A': ('MiddleName',), # Contact, for Message this is Card Data
-            '1F:C8': ('Spouse',), # Contact
-            '1F:C9': ('Child',), # Contact
-            '1F:D5': ('AstrologicalSign',), # Contact
-            '1F:D6': ('Age',), # Contact
-            '1F:E5': ('BloodType',), # Contact
-            '1F:E6': ('InterestsHobbies',), # Contact
-            '1F:E7': ('Initials',), # Contact
-            '1F:FA': ('HomeAddressFormat',), # Contact, Country Code
-            '1F:FB': ('WorkAddressFormat',), # Contact, Country Code
-            '1F:FD': ('PhoneOther',), # Contact
-            '1F:FE': ('PhoneOtherFax',), # Contact
-            '1F:FF': ('PhoneRadio',), # Contact
-            '1F:0001': ('OtherAddressStreet',), # Contact
-            '1F:0101': ('OtherAddressCity',), # Contact
-            '1F:0201': ('OtherAddressState',), # Contact
-            '1F:0301': ('OtherAddressPostalCode',), # Contact
-            '1F:0401': ('OtherAddressCountry',), # Contact
-            '1F:0601': ('OtherAddressFormat',), # Contact, Seems bugged in Outlook 16 
-            '1F:2C01': ('DisplayName',), # Accounts (both)
-            '1F:2E01': ('UserName',), # Accounts (Mail)
-            '1F:2F01': ('EmailAddressUnicode',), # Accounts (both), same as string email address
-            '1F:3101': ('unicode3101',), # Account (Exchange), null or empty
-            '1F:3401': ('FileNameUnicode',), # Attachment
-            '1F:3501': ('Name',), # Category
-            '1F:3601': ('Name',), # Folder
-            '1F:3701': ('Title',), # Note
-            '1F:3801': ('Body',), # Note
-            '1F:3901': ('Name',), # Signature
-            '1F:3A01': ('Body',), # Signature
-            '1F:3B01': ('SoundSet',), # Main
-            '1F:3C01': ('DefaultCategory',), # Accounts (Exchange)
-            '1F:4401': ('unicode4401',), # Attachment
-            '1F:4C01': ('CalendarOwnerName',), # Folder
-
-            # additional long codes
-            #   14 == max(15.values()) except for a few Messages
-            #   Mostly 1, but can be up to 15
-            #   16 is not always present, always zero except for a few Messages
-            #   Can be 1, 4, or 5 when non-zero
-            '20:14': ('foot14',),
-            '20:15': ('foot15', 'rF', lambda b: self._read_sizes(b, 'q')),
-            '20:16': ('foot16',),
-
-            # GUIDs for a class (CLSID)
-            '48:00': ('UUID',), # Category, Contact, Event, Note, Task
-
-            # Apple Mac Absolute timestamps (seconds since Jan 1 2001)
-            '4D:01': ('TimeSent',),
-            '4D:02': ('TimeReceived',),
-            '4D:04': ('ModDate',),
-            '4D:09': ('StartDate',), # Task
-            '4D:0A': ('CompletedDate',), # Task
-            '4D:0B': ('DueDate',), # Task
-            '4D:0C': ('Reminder',), # Task
-            '4D:0D': ('Reminder2',), # Task, same as reminder 
-            '4D:10': ('DownloadDate2',), # Event, sent by me, same as 11
-            '4D:11': ('DownloadDate',),
-            '4D:12': ('CreationTime',),
-            '4D:15': ('date15',), # Message, off from Received by ~seconds
-            '4D:16': ('DismissTime',), # Event
-            '4D:17': ('ReplyTime',), # Event
-            '4D:18': ('OwnerCriticalChange',), # Event
-            '4D:19': ('date19',), # Event
-            '4D:1A': ('date1A',), # Message, similar to date15?
-            '4D:1B': ('ScheduledSendDate',), # Message
-            '4D:2C01': ('date2C01',), # Account (Exchange), 2016-08-27
-            '4D:2D01': ('date2D01',), # Account (Exchange)
-            '4D:2E01': ('date2E01',), # Folder, ?
-            '4D:2F01': ('date2F01',), # Folder, ?
-            '4D:3001': ('date3001',), # Folder
-            '4D:3101': ('CreatedDate',), # Note
-            '4D:3201': ('CreatedDate',), # Account (Exchange)
-            '4D:3301': ('CreatedDate',), # Category
-            '4D:3401': ('date3401',), # Category, null except one
-            '4D:3501': ('date3501',), # Category, always null
-            '4D:3601': ('date3601',), # Category, always null
-            '4D:3701': ('date3701',), # Category, always null
-            '4D:3801': ('date3801',), # Category, always null
-            '4D:3901': ('date3901',), # Category, always null
-            '4D:3A01': ('date3A01',), # Account (Exchange), 2016-08-27
-            '4D:3D01': ('date3D01',), # Account (Mail)
-
-            # TZPROP attributes
-            '4643:7A74': ('TZID', 'rF', lambda b: b.decode()),
-            '5A54:4449': ('MSTZID', 'rF', lambda b: unpack('<i', b)[0]),
-            '614E:656D': ('TZLongName', 'rF', lambda b: b.decode()),
-            # 7453 -> STANDARD time property
-            '7453:6C52': ('RRule', 'rF', lambda b: b.decode()),
-            '7453:6F54': ('OffsetTo', 'rF', lambda b: b.decode()),
-            '7453:7246': ('OffsetFrom', 'rF', lambda b: b.decode()),
-            '7453:7453': ('StartDate', 'rF', lambda b: dt_winminutes(unpack('<i', b)[0])),
-            # 4C44 -> DAYLIGHT time property
-            '4C44:6C52': ('RRule', 'rF', lambda b: b.decode()),
-            '4C44:6F54': ('OffsetTo', 'rF', lambda b: b.decode()),
-            '4C44:7246': ('OffsetFrom', 'rF', lambda b: b.decode()),
-            '4C44:7453': ('StartDate', 'rF', lambda b: dt_winminutes(unpack('<i', b)[0])),
-            }
+    def parse_collection(self, chunk, fmt):
+        # Parse one collection from a buffer with a compiled schema (see
+        #  CLASSTOFORMAT), e.g. an entity's main collection
+        return self._parse_collection(memoryview(chunk), fmt)
 
     def _parse(self, buff):
         # check magic bytes
@@ -937,7 +1065,7 @@ class OlkDataFile:
         elif entity_block == 2:
             return self._parse_block(buff, out)
         else:
-            print('Invalid file, entity/block value =', entity_block)
+            log.warning('Invalid file %s, entity/block value = %s', self.path, entity_block)
             return out
 
     def _parse_entity(self, buff, out):
@@ -948,19 +1076,27 @@ class OlkDataFile:
         out['BlockType'] = ol_type_code(buff.read(4))
         out['ItemID'] = buff.read(4)
 
-        # get the schema to use based on the class ID
-        schema = CLASSTOSCHEMA[class_id]
-        self.skip_indb.extend(schema.get('skip_indb', list()))
-
-        # read the main collection
-        out.update(self._parse_collection(buff.read(), schema))
+        # get the compiled schema to use based on the class ID
+        fmt = CLASSTOFORMAT[class_id]
+        self.skip_indb = fmt.skip_indb
+
+        # read the main collection, collections are parsed from a memoryview
+        #  so that nested items can be sliced out without copying
+        # fields already in Outlook.sqlite, or not asked for, aren't decoded
+        #  (with fields, only the keys they need are kept, so unmapped keys
+        #  are left out too)
+        with memoryview(buff)[buff.tell():] as body:
+            out.update(self._parse_collection(
+                body, fmt, fmt.dropped(self.fields), buff.tell(),
+                fmt.kept(self.fields)
+                ))
 
         # allow for extra processing
-        if schema['class'] == 'OlkEvent':
+        if fmt.name == 'OlkEvent':
             out = self._additional_parsing_event(out)
-        elif schema['class'] == 'OlkContact':
+        elif fmt.name == 'OlkContact':
             out = self._additional_parsing_contact(out)
-        elif schema['class'] == 'OlkMain':
+        elif fmt.name == 'OlkMain':
             out = self._additional_parsing_main(out)
         out = self._additional_parsing_collect_xml(out)
 
@@ -974,10 +1110,10 @@ class OlkDataFile:
 
         if out['BlockType'] == 'ImgB':
             # Binary file data
-            out['FileData'] = buff.read()
+            out['FileData'] = self._payload(buff)
         elif out['BlockType'] in ('Attc', 'MSrc', 'ClAt'):
             # Text file data
-            out['FileContents'] = buff.read().decode()
+            out['FileContents'] = self._payload(buff, 'utf-8')
         elif out['BlockType'] == 'RcnA':
             out.update(self._block_rcna_parse(buff))
         # TBD ----
@@ -986,202 +1122,244 @@ class OlkDataFile:
         elif out['BlockType'] == 'ExFS':
             out = self._block_folder_sync(buff, out)
         else:
-            print('Unknown block type', out['BlockType'])
+            log.warning('Unknown block type %s', out['BlockType'])
             out['BlockData'] = buff.read()
         return out
 
-    def _parse_collection(self, chunk, schema):
+    def _payload(self, buff, encoding=None):
+        # file data can be large, so just note where it is
+        offset = buff.tell()
+        return OlkPayload(self.path, offset, buff.size() - offset, encoding)
+
+    def _parse_collection(self, chunk, fmt, dropped=None, offset=None,
+                          kept=None):
         # this is a common pattern across several sections of Olk data files
         # first, there are three integers
         #  1. number of items
         #  2. size of the header (including these 12 bytes)
         #  3. size of the body
-        (num_items, head_size, body_size) = unpack('<3i', chunk[:12])
+        (num_items, head_size, body_size) = unpack_from('<3i', chunk)
 
         # then, the rest of the header is as array defining the size of each
         # item in the body
         sizes = self._read_sizes(chunk[12:head_size])
 
         # we can use the sizes to split the data in the body section into
-        # items corresponding to a key
-        items = self._split_with_array(sizes, chunk[head_size:])
-
-        # finally, the OLKDATAFILE format dictionary tells us what the human-
-        # readable name and type of each entry is, based on the key
-        items = self._format_items(self.OLKDATAFILE, items, schema)
+        # items corresponding to a key, leaving out keys that are dropped,
+        # or (if kept is given) any that aren't kept
+        if dropped is None:
+            dropped = fmt.skip_keys
+        items = self._split_with_array(sizes, chunk[head_size:], dropped, kept)
+
+        # for the main collection (which is at offset in the file), note where
+        # each item is, and leave deferred fields to be read later
+        deferred = dict()
+        if offset is not None and self.deferred:
+            deferred = self._defer_items(sizes, items, fmt, offset + head_size)
+
+        # finally, the compiled schema tells us what the human-readable name
+        # and type of each entry is, based on the key
+        items = self._format_items(items, fmt)
+        items.update(deferred)
 
         return items
 
-    def _read_sizes(self, chunk, fmt='i'):
+    @staticmethod
+    def _read_sizes(chunk, fmt='i'):
         # array schema is BBBBAAAA ########
         # AAAA corresponds to a .Net Varient Type Code
         #   Some regions have longer, custom codes
         # BBBB is an ID that's unique within each varient type
-        # flip them around for the format dict mapping
-        array = defaultdict(dict)
-        valsize = 8 if fmt == 'q' else 4
-        for i in range(0, len(chunk), 4 + valsize):
-            item = chunk[i:i + 4 + valsize]
-            a = hex_str_arr(item[2:4] if item[2] > 0 else item[3:4])
-            b = hex_str_arr(item[0:2] if item[1] > 0 else item[0:1])
-            array[(a, b)] = unpack('<' + fmt, item[4:])[0]
-        return array
-
-    def _split_with_array(self, arr, chunk):
+        # flip them around for the format dict mapping, as integers (see
+        # format_key for the hex strings used in OLKDATAFILE)
+        # BBBB is little-endian, so it can be read as one short
+        return {
+            (a0 << 8 | a1, b): size
+            for (b, a0, a1, size) in SIZE_TABLE[fmt].iter_unpack(chunk)
+            }
+
+    def _split_with_array(self, arr, chunk, dropped=frozenset(), kept=None):
         # split body into sections using the header array
         split = dict()
+        pos = 0
         for k, size in arr.items():
-            if size == 0:
-                split[k] = b''
-            else:
-                split[k] = chunk[:size]
-                chunk = chunk[size:]
-        if chunk:
-            print(len(chunk), 'bytes remaining')
+            if k not in dropped and (kept is None or k in kept):
+                split[k] = chunk[pos:pos + size]
+            pos += size
+        if pos < len(chunk):
+            log.warning('%s bytes remaining in %s', len(chunk) - pos, self.path)
         return split
 
-    def _format_items(self, formats, items, schema):
+    def _defer_items(self, sizes, items, fmt, pos):
+        # record the file offset and size of each field (unmapped keys by
+        #  their hex string), and swap plain text fields in self.deferred for
+        #  payloads, taking them out of items
+        deferred = dict()
+        for key, size in sizes.items():
+            if key in fmt.fields:
+                out_name, raw, _, handler, _ = fmt.fields[key]
+            else:
+                out_name, raw, _, handler, _ = fmt.unmapped(key)
+            self.offsets[out_name] = (pos, size)
+            if key in items and out_name in self.deferred and not raw \
+                    and handler is None and key[0] in TEXT_ENCODINGS:
+                del items[key]
+                deferred[out_name] = OlkPayload(
+                    self.path, pos, size, TEXT_ENCODINGS[key[0]]
+                    )
+            pos += size
+        return deferred
+
+    def _format_items(self, items, fmt):
+        # use the schema's compiled decoders, which time handlers the same
+        #  way when there are stats
+        if self.COMPILED:
+            return fmt.decode(self, items)
+        return self._interpret_items(items, fmt)
+
+    def _interpret_items(self, items, fmt):
         # format items
-        # first, use the varient type code from the size array to read bytes
-        # then, look up the mapped field name and an optional handler from
-        #  the formats dict
+        # first, look up the mapped field name and optional handler in the
+        #  compiled schema
+        # then, use the varient type code from the size array to read bytes,
+        #  and pass them to the handler
         out = dict()
-        for ((vartype, idx), chunk) in items.items():
+        stats = self.stats
+        for (key, chunk) in items.items():
             # grab the format information
-            # format is ([name], [handler_mode], [handler])
+            # format is (name, raw, handler_mode, handler, skip)
+            # raw means the bytes are passed to the handler as-is
             # handler_mode determines how to handle the value
-            #   first character is r or f - raw or formated
-            #   second character is C, L, E, F, or X - collection, list, enum,
-            #     function, or None
-            key = vartype + ':' + idx
-            if key not in formats:
-                print('Unmapped key: ', key, schema['class'])
-            fmt = formats.get(key, tuple())
-            out_name = fmt[0] if len(fmt) >= 1 else key
-            handler_mode = fmt[1] if len(fmt) >= 2 else None
-            handler = fmt[2] if len(fmt) == 3 else None
+            #   C, L, E, F, M, or None - collection, list, enum, function,
+            #   method, or None
+            if key in fmt.fields:
+                out_name, raw, handler_mode, handler, skip = fmt.fields[key]
+            else:
+                out_name, raw, handler_mode, handler, skip = fmt.unmapped(key)
+                self.unmapped.add(fmt.name, out_name)
 
-            # get override handlers
-            if key in schema.get('override', dict()):
-                out_name, handler_mode, handler = schema['override'][key]
+            # skip attributes that aren't useful
+            if skip:
+                continue
+
+            # collections, lists and methods read straight from the view,
+            #  everything else gets its own copy of the bytes
+            if handler_mode not in ('C', 'L', 'M'):
+                chunk = chunk.tobytes()
 
             # see VarientType dict up top, these are the ones we see in
             # the OlkData files
-            if handler_mode and handler_mode[0] == 'r':
+            vartype = key[0]
+            if raw:
                 pass
-            elif vartype == '02':   # short (signed 2 byte int)
+            elif vartype == 0x02:   # short (signed 2 byte int)
                 try:
                     chunk = unpack('<h', chunk)[0]
                 except:
-                    print('error on', key, schema['class'], chunk)
-            elif vartype == '03': # int (signed 4 byte int)
+                    log.warning('error on %s %s %r', format_key(*key), fmt.name, chunk)
+            elif vartype == 0x03: # int (signed 4 byte int)
                 try:
                     chunk = unpack('<i', chunk)[0]
                 except:
-                    print('error on', key, schema['class'], chunk)
-            elif vartype == '08': # bstring (byte string)
+                    log.warning('error on %s %s %r', format_key(*key), fmt.name, chunk)
+            elif vartype == 0x08: # bstring (byte string)
                 chunk = chunk
-            elif vartype == '0B': # bool
+            elif vartype == 0x0B: # bool
                 chunk = unpack('<?', chunk)[0]
-            elif vartype == '0D': # data access object (pass bytes to handler)
+            elif vartype == 0x0D: # data access object (pass bytes to handler)
                 pass
-            elif vartype == '14': # long (signed 8 byte int)
+            elif vartype == 0x14: # long (signed 8 byte int)
                 chunk = unpack('<q', chunk)[0]
-            elif vartype == '1D': # simple strings (emails, chat names, etc.)
+            elif vartype == 0x1D: # simple strings (emails, chat names, etc.)
                 chunk = chunk.decode()
-            elif vartype == '1E': # string (ANSI)
+            elif vartype == 0x1E: # string (ANSI)
                 chunk = chunk.decode()
-            elif vartype == '1F': # Unicode string ("wide")
+            elif vartype == 0x1F: # Unicode string ("wide")
                 chunk = chunk.decode('utf-16')
-            elif vartype == '20': # ?
+            elif vartype == 0x20: # ?
                 chunk = unpack('<q', chunk)[0]
-            elif vartype == '48': # GUID
+            elif vartype == 0x48: # GUID
                 pass
-            elif vartype == '4D': # Apple Mac Absolute Date (stored as double)
+            elif vartype == 0x4D: # Apple Mac Absolute Date (stored as double)
                 chunk = dt_macabsolute(unpack('<d', chunk)[0])
             # TIMEZONE and TZPROP types
-            elif vartype in ('4643', '7453', '4C44'):
+            elif vartype in (0x4643, 0x7453, 0x4C44):
                 pass
             else:
-                print('New Variant type:', vartype, schema['class'])
+                log.warning('New Variant type: %s %s', format_key(*key), fmt.name)
 
-            # invoke handler using handler_mode
+            # invoke handler using handler_mode, timing it if there are stats
+            #  (collections and lists include the time for their own fields)
             if handler is not None:
-                if handler_mode[1] == 'L':
+                if stats is not None:
+                    start = perf_counter()
+                if handler_mode == 'L':
                     chunk = self._parse_list(chunk, handler)
-                elif handler_mode[1] == 'C':
+                elif handler_mode == 'C':
                     chunk = self._parse_collection(chunk, handler)
-                elif handler_mode[1] == 'E':
+                elif handler_mode == 'E':
                     try:
                         chunk = handler[chunk]
                     except KeyError:
-                        print(handler, chunk)
-                elif handler_mode[1] == 'F':
+                        log.warning('Unknown %s value %r', out_name, chunk)
+                elif handler_mode == 'F':
                     chunk = handler(chunk)
+                elif handler_mode == 'M':
+                    chunk = handler(self, chunk)
                 else:
                     raise ValueError("Invalid handler mode")
-
-            # check to see if we remap this
-            if 'remap' in schema:
-                out_name = schema['remap'].get(key, out_name)
-
-            # skip attributes that aren't useful
-            skip_items = ['foot14', 'foot15', 'foot16']
-            skip_items.extend(schema.get('skip_null', list()))
-            skip_items.extend(schema.get('skip_dupe', list()))
-            if out_name in skip_items:
-                continue
+                if stats is not None:
+                    stats.add_handler_time(fmt.name, out_name, perf_counter() - start)
 
             # store item in output dictionary
             out[out_name] = chunk
 
         return out
 
-    def _parse_list(self, chunk, item_format_dict):
+    def _parse_list(self, chunk, fmt):
         # This is another common patter, a list of collections of the same type
         # First is an integer indicating how long the list is
-        (length,) = unpack('<i', chunk[:4])
-        chunk = chunk[4:]
+        (length,) = unpack_from('<i', chunk)
 
         # then, that many shorts with the length of each item
-        item_sizes = unpack('<' + str(length) + 'h', chunk[:length * 2])
-        chunk = chunk[length * 2:]
+        item_sizes = unpack_from('<' + str(length) + 'h', chunk, 4)
+        pos = 4 + length * 2
 
         # split items and parse
         items = list()
         for size in item_sizes:
             # each item is a collection
-            items.append(self._parse_collection(chunk[:size], item_format_dict))
-            chunk = chunk[size:]
+            items.append(self._parse_collection(chunk[pos:pos + size], fmt))
+            pos += size
 
         return items
 
     def _event_reply_to_parse(self, chunk):
         # structure: one null byte, then two shorts
         #  first short is 1, second is the length of the list
-        (_, num_entries) = unpack('<xhh', chunk[:5])
-        chunk = chunk[5:]
+        (_, num_entries) = unpack_from('<xhh', chunk)
+        pos = 5
         
         # each entry starts with a 4 byte int of the string length followed by
         #  one byte with the same value, then the string
         # entries are terminated by 4 null bytes
         email_list = list()
-        while chunk:
-            (size,) = unpack('<i', chunk[:4])
-            email_list.append(chunk[5:size + 5].decode('ascii'))
-            chunk = chunk[size + 9:]
+        while pos < len(chunk):
+            (size,) = unpack_from('<i', chunk, pos)
+            email_list.append(str(chunk[pos + 5:pos + size + 5], 'ascii'))
+            pos += size + 9
         return email_list
 
     def _message_user_list_parse(self, chunk):
         # first four bytes are the length, then an \x02
-        (n, _) = unpack('<ib', chunk[:5])
-        chunk = chunk[5:]
+        (n, _) = unpack_from('<ib', chunk)
+        pos = 5
         out = list()
         for i in range(n):
-            size = unpack('<h', chunk[:2])[0]
-            chunk = chunk[2:]
-            out.append(self._message_user_parse(chunk[:size]))
-            chunk = chunk[size:]
+            size = unpack_from('<h', chunk, pos)[0]
+            pos += 2
+            out.append(self._message_user_parse(chunk[pos:pos + size]))
+            pos += size
 
         return out
 
@@ -1195,38 +1373,37 @@ class OlkDataFile:
         #   7: External Email
         #   8: Private Group?
         # B5: 0, 1
-        flags = unpack('<h4b', chunk[:6])
-        chunk = chunk[28:]
+        flags = unpack_from('<h4b', chunk)
+        pos = 28
 
         # Then an email string
-        email_size = unpack('<i', chunk[:4])[0]
-        chunk = chunk[4:]
-        email = chunk[:email_size].decode()
-        chunk = chunk[email_size:]
+        email_size = unpack_from('<i', chunk, pos)[0]
+        pos += 4
+        email = str(chunk[pos:pos + email_size], 'utf-8')
+        pos += email_size
 
         # Then a name string
-        name_size = unpack('<i', chunk[:4])[0]
-        chunk = chunk[4:]
-        name = chunk[:name_size].decode('utf-16')
-        chunk = chunk[name_size:]
+        name_size = unpack_from('<i', chunk, pos)[0]
+        pos += 4
+        name = str(chunk[pos:pos + name_size], 'utf-16')
 
         return {'Address': email, 'Name': name, 'Type': OlUserType[flags[1]]}
 
     def _actions_taken_parse(self, chunk):
         # this is like a collection, but can have arbitrary numbers of values
-        (num_items, head_size, body_size) = unpack('<3i', chunk[:12])
+        (num_items, head_size, body_size) = unpack_from('<3i', chunk)
         sizes = self._read_sizes(chunk[12:head_size])
         items = self._split_with_array(sizes, chunk[head_size:])
 
         # first grab the number of actions
-        action_count = unpack('<h', items.pop(('00', '01')))[0]
+        action_count = unpack('<h', items.pop((0x00, 0x01)))[0]
 
         # then, loop through actions and add them to a list
         actions = list()
         for i in range(action_count):
-            a = items.pop(('00', hex(100 + i*10)[2:].upper()))
-            b = items.pop(('00', hex(101 + i*10)[2:].upper()))
-            c = items.pop(('00', hex(102 + i*10)[2:].upper()), b'\xff\xff\xff\xff')
+            a = items.pop((0x00, 100 + i*10))
+            b = items.pop((0x00, 101 + i*10))
+            c = items.pop((0x00, 102 + i*10), b'\xff\xff\xff\xff')
             actions.append({
                 'Type': OlAction[unpack('<h', a)[0]],
                 'Date': dt_macabsolute(unpack('<d', b)[0]),
@@ -1266,11 +1443,13 @@ class OlkDataFile:
             if 'ExceptionDates' not in out['RRule']:
                 out['RRule']['ExceptionDates'] = list()
 
-        # add timezone to organizer start & end date
-        tz = out['Timezone']['TZID']
-        out['StartDateOrganizer'] = out['StartDateOrganizer'].replace(tzinfo=ZoneInfo(tz))
-        out['EndDateOrganizer'] = out['EndDateOrganizer'].replace(tzinfo=ZoneInfo(tz))
-        out['ReplyTime'] = out['ReplyTime'].replace(tzinfo=ZoneInfo(tz))
+        # add timezone to organizer start & end date, any of these can be
+        #  missing when only some fields are parsed
+        if 'Timezone' in out:
+            tz = ZoneInfo(out['Timezone']['TZID'])
+            for k in ('StartDateOrganizer', 'EndDateOrganizer', 'ReplyTime'):
+                if k in out:
+                    out[k] = out[k].replace(tzinfo=tz)
 
         return out
 
@@ -1478,3 +1657,248 @@ class OlkDataFile:
     def _block_folder_sync(self, buff, out):
         out['data'] = buff.read()
         return out
+
+
+## Compiled schemas
+def format_key(vartype, idx):
+    # Hex string for a size table key, as used in OLKDATAFILE
+    # vartype is big-endian and idx little-endian, and both use one byte
+    # when the other byte is zero, e.g. (0x1F, 0x012C) -> '1F:2C01'
+    a = vartype.to_bytes(2, 'big') if vartype > 0xFF else [vartype]
+    b = idx.to_bytes(2, 'little') if idx > 0xFF else [idx]
+    return hex_str_arr(a) + ':' + hex_str_arr(b)
+
+def parse_key(key):
+    # Inverse of format_key, e.g. '1F:2C01' -> (0x1F, 0x012C)
+    vartype, idx = key.split(':')
+    return (int(vartype, 16), int.from_bytes(bytes.fromhex(idx), 'little'))
+
+
+class OlkFormat:
+    """Lookup table for one schema, merging OLKDATAFILE with its overrides,
+    remaps and skip lists, keyed by integer (vartype, idx) pairs"""
+
+    def __init__(self, schema):
+        self.name = schema['class']
+        self.skip_indb = SKIP_INDB.union(schema.get('skip_indb', list()))
+        self.skip = frozenset(
+            ['foot14', 'foot15', 'foot16'] +
+            schema.get('skip_null', list()) +
+            schema.get('skip_dupe', list())
+            )
+
+        self.fields = dict()
+        # keys dropped from the main collection, by the fields asked for
+        self._dropped = dict()
+        # and the keys that are kept, by the fields asked for
+        self._kept = dict()
+
+    def compile(self, schema):
+        # Nested schemas can refer back to their parents, so this runs after
+        # the format has been registered in FORMATS
+        override = schema.get('override', dict())
+        remap = schema.get('remap', dict())
+        for key in OLKDATAFILE.keys() | override.keys() | remap.keys():
+            fmt = override.get(key, OLKDATAFILE.get(key, tuple()))
+            out_name = fmt[0] if len(fmt) >= 1 else key
+            handler_mode = fmt[1] if len(fmt) >= 2 else None
+            handler = fmt[2] if len(fmt) == 3 else None
+            out_name = remap.get(key, out_name)
+
+            # resolve handlers ahead of time
+            if handler is not None:
+                if handler_mode[1] in ('C', 'L'):
+                    handler = compile_schema(handler)
+                elif handler_mode[1] == 'M':
+                    handler = getattr(OlkDataFile, handler)
+
+            self.fields[parse_key(key)] = (
+                out_name,
+                bool(handler_mode) and handler_mode[0] == 'r',
+                handler_mode[1] if handler is not None else None,
+                handler,
+                out_name in self.skip
+                )
+        self.skip_keys = frozenset(k for k, f in self.fields.items() if f[4])
+
+        # (out name, conversion, handler) for each field, None for skipped
+        #  ones. Fields that can't be compiled are left out, for the
+        #  interpreter
+        self.decoders = dict()
+        for key, field in self.fields.items():
+            if field[4]:
+                self.decoders[key] = None
+                continue
+            decoder = compile_field(self.name, key, field)
+            if decoder is not None:
+                self.decoders[key] = decoder
+
+    def dropped(self, fields=None):
+        # Keys of an entity's main collection that don't need to be decoded:
+        #  skipped ones, ones already in Outlook.sqlite, and (if fields is
+        #  given) ones that aren't in fields or used to build them
+        if fields not in self._dropped:
+            self._dropped[fields] = frozenset(
+                k for k, (out_name, *_, skip) in self.fields.items()
+                if skip or out_name in self.skip_indb
+                or (fields is not None and not requested(out_name, fields))
+                )
+        return self._dropped[fields]
+
+    def kept(self, fields=None):
+        # With fields, the only keys of an entity's main collection to
+        #  decode, any others (including unmapped ones) are left out.
+        #  Without, None
+        if fields is None:
+            return None
+        if fields not in self._kept:
+            dropped = self.dropped(fields)
+            self._kept[fields] = frozenset(
+                k for k in self.fields if k not in dropped
+                )
+        return self._kept[fields]
+
+    def decode(self, parser, items):
+        # Compiled equivalent of OlkDataFile._interpret_items, which still
+        #  handles unmapped keys and ones with new variant types
+        # handlers are timed if the parser has stats
+        out = dict()
+        decoders = self.decoders
+        stats = parser.stats
+        for key, chunk in items.items():
+            if key not in decoders:
+                out.update(parser._interpret_items({key: chunk}, self))
+                continue
+            decoder = decoders[key]
+            if decoder is None:
+                continue
+            (out_name, convert, handle) = decoder
+            if convert is not None:
+                chunk = convert(chunk)
+            if handle is not None:
+                if stats is None:
+                    chunk = handle(parser, chunk)
+                else:
+                    start = perf_counter()
+                    chunk = handle(parser, chunk)
+                    stats.add_handler_time(
+                        self.name, out_name, perf_counter() - start
+                        )
+            out[out_name] = chunk
+        return out
+
+    def unmapped(self, key):
+        # Format for a key that's not in OLKDATAFILE, named by its hex string
+        out_name = format_key(*key)
+        return (out_name, False, None, None, out_name in self.skip)
+
+
+def requested(out_name, fields):
+    # Whether a field is in fields, or is one that a field in fields is built
+    #  from (see DERIVED_FIELDS)
+    if out_name in fields:
+        return True
+    return any(
+        out_name.startswith(prefix)
+        for f in fields for prefix in DERIVED_FIELDS.get(f, tuple())
+        )
+
+
+def compile_field(name, key, field):
+    # (out name, conversion, handler) for one field of a schema, or None if
+    #  its variant type isn't known. The conversion is called with the
+    #  field's bytes and the handler with the parser and converted value,
+    #  doing what OlkDataFile._interpret_items would with the vartype and
+    #  handler mode resolved ahead of time
+    out_name, raw, handler_mode, handler, _ = field
+    vartype = key[0]
+    # collections, lists and methods read straight from the view
+    view = handler_mode in ('C', 'L', 'M')
+
+    if raw or vartype in PASSTHROUGH_TYPES:
+        convert = None if view else bytes
+    elif vartype in (0x02, 0x03):
+        unpack_int = Struct('<h' if vartype == 0x02 else '<i').unpack
+        def convert(chunk):
+            try:
+                return unpack_int(chunk)[0]
+            except:
+                chunk = chunk if view else bytes(chunk)
+                log.warning('error on %s %s %r', format_key(*key), name, chunk)
+                return chunk
+    elif vartype in CONVERTERS:
+        convert = CONVERTERS[vartype]
+    else:
+        return None
+
+    if handler is None:
+        handle = None
+    elif handler_mode == 'L':
+        handle = lambda parser, chunk: parser._parse_list(chunk, handler)
+    elif handler_mode == 'C':
+        handle = lambda parser, chunk: parser._parse_collection(chunk, handler)
+    elif handler_mode == 'E':
+        def handle(parser, chunk):
+            try:
+                return handler[chunk]
+            except KeyError:
+                log.warning('Unknown %s value %r', out_name, chunk)
+                return chunk
+    elif handler_mode == 'F':
+        handle = lambda parser, chunk: handler(chunk)
+    elif handler_mode == 'M':
+        handle = handler
+    else:
+        return None
+
+    return (out_name, convert, handle)
+
+
+def compile_schema(schema):
+    # Compile each schema once, and reuse it wherever it's referenced
+    if id(schema) not in FORMATS:
+        FORMATS[id(schema)] = OlkFormat(schema)
+        FORMATS[id(schema)].compile(schema)
+    return FORMATS[id(schema)]
+
+# Size table entries, with 4 or 8 byte sizes
+SIZE_TABLE = {'i': Struct('<HBBi'), 'q': Struct('<HBBq')}
+# Variant types that are passed on as bytes (see _interpret_items)
+PASSTHROUGH_TYPES = frozenset([0x08, 0x0D, 0x48, 0x4643, 0x7453, 0x4C44])
+# Conversions of the other variant types, for compiled decoders
+CONVERTERS = {
+    0x0B: lambda chunk, s=Struct('<?'): s.unpack(chunk)[0],
+    0x14: lambda chunk, s=Struct('<q'): s.unpack(chunk)[0],
+    0x1D: lambda chunk: str(chunk, 'utf-8'),
+    0x1E: lambda chunk: str(chunk, 'utf-8'),
+    0x1F: lambda chunk: str(chunk, 'utf-16'),
+    0x20: lambda chunk, s=Struct('<q'): s.unpack(chunk)[0],
+    0x4D: lambda chunk, s=Struct('<d'): dt_macabsolute(s.unpack(chunk)[0]),
+    }
+# Fields from the entity header that are already in Outlook.sqlite
+SKIP_INDB = frozenset(['RecordID', 'ItemID'])
+# Text fields left in the file by OlkDataFile(deferred=True)
+DEFERRED_FIELDS = frozenset(['Body', 'HTMLBody'])
+# Encodings of text variant types (see _interpret_items)
+TEXT_ENCODINGS = {0x1D: 'utf-8', 0x1E: 'utf-8', 0x1F: 'utf-16'}
+# Fields put together after parsing, by the prefixes of the fields they're
+#  built from
+DERIVED_FIELDS = {
+    'XML': ('XML:',),
+    'EmailAddresses': (
+        'EmailAddress_', 'EmailTypesRaw', 'EmailCount', 'DefaultEmailRaw'
+        ),
+    'DefaultEmailAddress': (
+        'EmailAddress_', 'EmailTypesRaw', 'EmailCount', 'DefaultEmailRaw'
+        ),
+    'IMAddresses': ('IMAddress_', 'IMTypesRaw', 'IMCount', 'DefaultIMRaw'),
+    'DefaultIMAddress': (
+        'IMAddress_', 'IMTypesRaw', 'IMCount', 'DefaultIMRaw'
+        ),
+    'StartDateOrganizer': ('Timezone',),
+    'EndDateOrganizer': ('Timezone',),
+    'ReplyTime': ('Timezone',),
+    }
+# Compiled schemas by schema dict, and by class ID for entities
+FORMATS = dict()
+CLASSTOFORMAT = {k: compile_schema(v) for k, v in CLASSTOSCHEMA.items()}
@@ -0,0 +1,68 @@
+"""Bulk writers putting a folder's messages in one mbox file or Maildir"""
+
+import mailbox
+import re
+from datetime import timezone
+
+# mboxrd quoting, any line starting with zero or more '>' then 'From '
+FROM_LINE = re.compile(rb'^(>*From )', re.MULTILINE)
+
+
+class OlkMbox:
+    """Append-only, buffered mboxrd file"""
+    BUFFER_SIZE = 1024 ** 2
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb', buffering=self.BUFFER_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, msg):
+        # Message source is written as-is, apart from quoting 'From ' lines
+        self.file.write(self._from_line(msg))
+        source = FROM_LINE.sub(rb'>\1', msg.to_bytes())
+        self.file.write(source)
+        if not source.endswith(b'\n'):
+            self.file.write(b'\n')
+        self.file.write(b'\n')
+
+    def close(self):
+        self.file.close()
+
+    def _from_line(self, msg):
+        # 'From sender date' separator line, dates are in UTC asctime format
+        sender = msg.From[0].Address if msg.From else None
+        date = msg.TimeReceived or msg.TimeSent
+        if date is not None:
+            date = date.astimezone(timezone.utc).strftime('%a %b %d %H:%M:%S %Y')
+        else:
+            date = 'Thu Jan 01 00:00:00 1970'
+        return ('From ' + (sender or 'MAILER-DAEMON') + ' ' + date + '\n').encode()
+
+
+class OlkMaildir:
+    """Maildir with one file per message, in new/"""
+
+    def __init__(self, path):
+        self.path = path
+        self.maildir = mailbox.Maildir(path, factory=None, create=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, msg):
+        self.maildir.add(msg.to_bytes())
+
+    def close(self):
+        self.maildir.close()
+
+
+MAILBOXES = {'mbox': OlkMbox, 'maildir': OlkMaildir}
@@ -5,7 +5,8 @@ import email
 from email.message import EmailMessage
 from uuid import UUID
 from datetime import datetime, date, timedelta
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from functools import cache
 
 import icalendar
 from bs4 import BeautifulSoup
@@ -13,14 +14,32 @@ from bs4 import BeautifulSoup
 from utils import *
 from datafiles import *
 
+@cache
+def field_names(cls):
+    return frozenset(f.name for f in fields(cls))
+
+def loaded_fields(olk):
+    # Fields that have been set, leaving out data file fields that weren't in
+    # the data file (with slots, these hold their default rather than being
+    # missing from the instance)
+    out = dict()
+    for f in fields(olk):
+        value = getattr(olk, f.name)
+        if f.init or value is not f.default:
+            out[f.name] = value
+    return out
+
 def append(olk, data):
-    keys = list(data.keys())
-    for key in keys:
-        if hasattr(olk, key):
-            setattr(olk, key, data.pop(key))
+    # Move the values for olk's fields out of data and onto olk
+    for key in field_names(type(olk)).intersection(data):
+        setattr(olk, key, data.pop(key))
 
 def export(olk, path):
-    # File name
+    write_file(path, *render_file(olk))
+
+def render_file(olk):
+    # File name, the RecordID if the name is missing (e.g. it's only in the
+    #  data file, with metadata_only or fields=)
     if type(olk) is OlkFolder:
         name = '_' + str(olk.RecordID)
     elif type(olk) is OlkMain:
@@ -29,22 +48,29 @@ def export(olk, path):
         name = 'AccountMail ' + str(olk.RecordID)
     elif type(olk) is OlkAccountExchange:
         name = 'AccountExch ' + str(olk.RecordID)
-    elif type(olk) is OlkNote:
+    elif type(olk) is OlkNote and olk.Title is not None:
         name = olk.Title.replace('/', '')[:30].strip()
+    elif getattr(olk, 'Name', None) is not None:
+        name = olk.Name
     else:
-        if hasattr(olk, 'Name'):
-            name = olk.Name
-        else:
-            name = str(olk.RecordID)
+        name = str(olk.RecordID)
 
     # File data
     if hasattr(olk, 'to_file'):
         ext, data = olk.to_file()
     else:
         ext = 'json'
-        data = json.dumps(olk.__dict__, default=json_serializer)
+        data = json.dumps(loaded_fields(olk), default=json_default)
+
+    return (name, ext, data)
 
-    # Write
+def json_default(obj):
+    # Deferred text fields are written out as text
+    if isinstance(obj, OlkPayload):
+        return str(obj)
+    return json_serializer(obj)
+
+def write_file(path, name, ext, data):
     path = path + ('/' if path else '') + name + '.' + ext
     with open(path, 'w') as f:
         f.write(data)
@@ -53,14 +79,14 @@ def dataField(r=False):
     return field(default=None, init=False, repr=r)
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkAction:
     Type: str
     Date: datetime
     RecordID: int
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkRecipient:
     Type: str
     Name: str
@@ -71,21 +97,21 @@ def get_angle_addr(user):
     return user.Name + ' <' + user.Address + '>'
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkMessage:
     # Outlook.sqlite fields
     RecordID: int
     FolderID: int
     AccountUID: int
     ModDate: datetime = field(repr=False)
-    MessageType: str = field(repr=False)
+    MessageType: int = field(repr=False)
     HasAttachment: bool = field(repr=False)
     Hidden: bool = field(repr=False)
     IMAPUID: int = field(repr=False)
     IsOutgoingMessage: bool = field(repr=False)
     MarkedForDelete: bool = field(repr=False)
     MentionedMe: bool = field(repr=False)
-    MessageID: int = field(repr=False)
+    MessageID: str = field(repr=False)
     NormalizedSubject: str = field(repr=False)
     PartiallyDownloaded: bool = field(repr=False)
     DownloadState: int = field(repr=False)
@@ -109,7 +135,7 @@ class OlkMessage:
     Priority: int = field(repr=False)
     HasReminder: bool = field(repr=False)
     InferenceClassification: int = field(repr=False)
-    CategoryID: int = field(repr=False)
+    CategoryIDs: list = field(repr=False)
     # DataFile attributes
     #data: dict = dataField()
     BlockType: str = dataField()
@@ -128,6 +154,7 @@ class OlkMessage:
     XML: dict = dataField()
     vCalendar: str = dataField()
     Actions: list = dataField()
+    ActionsTaken: list = dataField()
     DidReply: bool = dataField()
     DidForward: bool = dataField()
     From: list = dataField()
@@ -142,7 +169,7 @@ class OlkMessage:
     MessageSize: int = dataField()
     # OwnedBlock attributes
     Attachments: list = field(default_factory=list, init=False, repr=False)
-    MessageSource: str = dataField()
+    MessageSource: OlkPayload = dataField()
 
     def add_data(self, data):
         # Grab important objects
@@ -175,19 +202,24 @@ class OlkMessage:
 
         msg.add_header('Date', email.utils.format_datetime(self.TimeSent))
 
-        msg.add_header('From', ', '.join(map(get_angle_addr, self.From)))
-        msg.add_header('To', ', '.join(map(get_angle_addr, self.To)))
-        msg.add_header('Cc', ', '.join(map(get_angle_addr, self.CC)))
-        msg.add_header('Bcc', ', '.join(map(get_angle_addr, self.BCC)))
+        # Recipients and the subject are only in the data file, so may be
+        #  missing (with metadata_only or fields=)
+        msg.add_header('From', ', '.join(map(get_angle_addr, self.From or list())))
+        msg.add_header('To', ', '.join(map(get_angle_addr, self.To or list())))
+        msg.add_header('Cc', ', '.join(map(get_angle_addr, self.CC or list())))
+        msg.add_header('Bcc', ', '.join(map(get_angle_addr, self.BCC or list())))
 
         msg.add_header('Message-ID', self.MessageID)
         msg.add_header('In-Reply-To', self.InReplyTo)
         msg.add_header('References', self.References)
 
-        msg.add_header('Subject', self.Subject)
+        if self.Subject is not None:
+            msg.add_header('Subject', self.Subject)
+        else:
+            msg.add_header('Subject', self.NormalizedSubject)
 
         if self.Body:
-            msg.set_content(self.Body)
+            msg.set_content(str(self.Body))
             msg.replace_header('Content-Type', 'text/html')
         elif self.Preview:
             msg.set_content(self.Preview)
@@ -196,7 +228,13 @@ class OlkMessage:
         # in this archive
         return ('eml', msg.as_string())
 
-@dataclass
+    def to_bytes(self):
+        # The cached message source if there is one, otherwise as to_file()
+        if self.MessageSource is not None:
+            return bytes(self.MessageSource)
+        return self.to_file()[1].encode()
+
+@dataclass(slots=True)
 class OlkAttendee:
     RecipientType: str
     Name: str
@@ -204,7 +242,7 @@ class OlkAttendee:
     AttendeeType: str
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkRRule:
     RecurrenceType: str
     Freq: str = field(repr=False)
@@ -220,7 +258,7 @@ class OlkRRule:
     SetPos: int = field(default=None, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkTimezone:
     TZID: str
     Name: str = field(repr=False)
@@ -244,7 +282,7 @@ def attach_to_event(mime, vevent, i='1'):
         vevent.add('attach', mime.get_payload().strip(), parameters=params)
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkEvent:
     # Outlook.sqlite fields
     RecordID: int
@@ -263,9 +301,9 @@ class OlkEvent:
     MasterRecordID: int = field(repr=False)
     ExchangeID: str = field(repr=False)
     ExchangeChangeKey: str = field(repr=False)
-    CategoryID: int = field(repr=False)
+    CategoryIDs: list = field(repr=False)
     # DataFile attributes
-    #data: dict = dataField()
+    data: dict = dataField()
     BlockType: str = dataField()
     StartDateOrganizer: datetime = dataField()
     EndDateOrganizer: datetime = dataField()
@@ -316,18 +354,21 @@ class OlkEvent:
         # Store data
         self.data = data
 
-        # Truncate timestamps for all day events
+        # Truncate timestamps for all day events, organizer dates can be
+        # missing if only some fields were parsed
         if self.AllDayEvent:
             self.StartDateUTC = self.StartDateUTC.date()
             self.EndDateUTC = self.EndDateUTC.date()
-            self.StartDateOrganizer = self.StartDateOrganizer.date()
-            self.EndDateOrganizer = self.EndDateOrganizer.date()
+            if self.StartDateOrganizer is not None:
+                self.StartDateOrganizer = self.StartDateOrganizer.date()
+            if self.EndDateOrganizer is not None:
+                self.EndDateOrganizer = self.EndDateOrganizer.date()
 
     def add_blockdata(self, blocks):
         # Store data
         for block in blocks:
             if block['BlockType'] == 'ClAt':
-                attachment = fix_attachment_encoding(block['FileContents'])
+                attachment = fix_attachment_encoding(str(block['FileContents']))
                 self.Attachments.append(attachment)
 
     def to_file(self):
@@ -335,28 +376,11 @@ class OlkEvent:
         cal.add('prodid', '-//Microsoft Corporation//Outlook for Mac MIMEDIR//EN')
         cal.add('version', '2.0')
 
-        tz = icalendar.Timezone()
-        tz.add('tzid', self.Timezone.TZID)
-
-        for standard in self.Timezone.Standard:
-            st = icalendar.TimezoneStandard()
-            st.add('dtstart', standard['StartDate'])
-            if standard['RRule']:
-                st['rrule'] = icalendar.vText(standard['RRule'])
-            st['tzoffsetfrom'] = icalendar.vText(standard['OffsetFrom'])
-            st['tzoffsetto'] = icalendar.vText(standard['OffsetTo'])
-            tz.add_component(st)
-
-        if self.Timezone.Daylight:
-            for daylight in self.Timezone.Daylight:
-                st = icalendar.TimezoneDaylight()
-                st.add('dtstart', daylight['StartDate'])
-                if daylight['RRule']:
-                    st['rrule'] = icalendar.vText(daylight['RRule'])
-                st['tzoffsetfrom'] = icalendar.vText(daylight['OffsetFrom'])
-                st['tzoffsetto'] = icalendar.vText(daylight['OffsetTo'])
-                tz.add_component(st)
-        cal.add_component(tz)
+        # Most of an event is only in its data file, so without it (with
+        #  metadata_only or fields=) only the Outlook.sqlite fields are
+        #  written, with the UTC start and end
+        if self.Timezone is not None:
+            cal.add_component(self._vtimezone())
 
         event = icalendar.Event()
         # uid
@@ -364,23 +388,28 @@ class OlkEvent:
         event.add('x-microsoft-exchange-id', self.ExchangeID)
         event.add('x-microsoft-exchange-changekey', self.ExchangeChangeKey)
         
-        event.add('dtstamp', self.OwnerCriticalChange)
-        event.add('dtstart', self.StartDateOrganizer)
-        event.add('dtend', self.EndDateOrganizer)
+        event.add('dtstamp', self.OwnerCriticalChange or self.ModDate)
+        if self.StartDateOrganizer is not None:
+            event.add('dtstart', self.StartDateOrganizer)
+            event.add('dtend', self.EndDateOrganizer)
+        else:
+            event.add('dtstart', self.StartDateUTC)
+            event.add('dtend', self.EndDateUTC)
         event.add('last-modified', self.ModDate)
 
         if self.Subject:
             event.add('summary', self.Subject)
-        body = self.Body.replace('\r\n', '\r').replace('\r', '\r\n')
-        plain = BeautifulSoup(body, features='lxml').get_text().strip()
-        event.add('description', plain)
+        if self.Body is not None:
+            body = str(self.Body).replace('\r\n', '\r').replace('\r', '\r\n')
+            plain = BeautifulSoup(body, features='lxml').get_text().strip()
+            event.add('description', plain)
         
         if self.Organizer:
             event.add('organizer', 'mailto:' + self.Organizer.Address[:-4],
                       parameters={'cn': self.Organizer.Name})
         #sequence: PidLidAppointmentSequence or 0
 
-        for a in self.Attendees:
+        for a in self.Attendees or list():
             params = {'cn': a.Name, 'rsvp': icalendar.vBoolean(False)}
             address = 'mailto:' + a.Address
             if a.RecipientType == 'Resource':
@@ -393,7 +422,8 @@ class OlkEvent:
             # PARTSTAT & RESPTIME not saved in Olk cache
             event.add('attendee', 'mailto:' + address[:-4], parameters=params)
         #categories: comma-delimited list of PidNameKeywords (category names)
-        event.add('class', self.Sensitivity)
+        if self.Sensitivity is not None:
+            event.add('class', self.Sensitivity)
         if self.CreationTime:
             event.add('created', self.CreationTime)
         #exdate: recurrence, DeletedInstanceDates
@@ -412,13 +442,17 @@ class OlkEvent:
         event.add('transp', transp)
 
         #x-alt-desc: PidTagRtfCompressed with param FMTTYPE=text/HTML
-        event.add('x-microsoft-cdo-busystatus', self.BusyStatus)
-        event['x-microsoft-cdo-alldayevent'] = icalendar.vBoolean(self.AllDayEvent)
+        if self.BusyStatus is not None:
+            event.add('x-microsoft-cdo-busystatus', self.BusyStatus)
+        if self.AllDayEvent is not None:
+            event['x-microsoft-cdo-alldayevent'] = icalendar.vBoolean(self.AllDayEvent)
         #x-microsoft-cdo-importance: from priority?
         #x-microsoft-cdo-ownerapptid: PidTagOwnerAppointmentId
         #x-microsoft-cdo-owner-critical-change: owner critical change time
-        event.add('x-microsoft-cdo-replytime', self.ReplyTime)
-        event['x-microsoft-disallow-counter'] = icalendar.vBoolean(not self.AllowNewTimeProposal)
+        if self.ReplyTime is not None:
+            event.add('x-microsoft-cdo-replytime', self.ReplyTime)
+        if self.AllowNewTimeProposal is not None:
+            event['x-microsoft-disallow-counter'] = icalendar.vBoolean(not self.AllowNewTimeProposal)
         if self.DoNotForward is not None:
             event['x-microsoft-donotforwardmeeting'] = icalendar.vBoolean(self.DoNotForward)
         #x-microsoft-cdo-insttype
@@ -435,7 +469,7 @@ class OlkEvent:
         #x-ms-olk-onlinepassword: PidLidOnlinePassword
         #x-ms-olk-orgalias: PidLidOrganizerAlias
 
-        if self.HasReminder:
+        if self.HasReminder and self.AlarmTrigger is not None:
             alarm = icalendar.Alarm()
             trigger = timedelta(minutes=self.AlarmTrigger)
             alarm['trigger'] = icalendar.vDuration(trigger)
@@ -451,15 +485,39 @@ class OlkEvent:
         cal.add_component(event)
         return ('ics', cal.to_ical().decode('utf-8'))
 
+    def _vtimezone(self):
+        tz = icalendar.Timezone()
+        tz.add('tzid', self.Timezone.TZID)
+
+        for standard in self.Timezone.Standard:
+            st = icalendar.TimezoneStandard()
+            st.add('dtstart', standard['StartDate'])
+            if standard['RRule']:
+                st['rrule'] = icalendar.vText(standard['RRule'])
+            st['tzoffsetfrom'] = icalendar.vText(standard['OffsetFrom'])
+            st['tzoffsetto'] = icalendar.vText(standard['OffsetTo'])
+            tz.add_component(st)
+
+        if self.Timezone.Daylight:
+            for daylight in self.Timezone.Daylight:
+                st = icalendar.TimezoneDaylight()
+                st.add('dtstart', daylight['StartDate'])
+                if daylight['RRule']:
+                    st['rrule'] = icalendar.vText(daylight['RRule'])
+                st['tzoffsetfrom'] = icalendar.vText(daylight['OffsetFrom'])
+                st['tzoffsetto'] = icalendar.vText(daylight['OffsetTo'])
+                tz.add_component(st)
+        return tz
 
-@dataclass
+
+@dataclass(slots=True)
 class OlkFolder:
     # Outlook.sqlite fields
     RecordID: int
     ModDate: datetime = field(repr=False)
     AccountUID: int
     ParentID: int
-    FolderClass: int = field(repr=False)
+    FolderClass: str = field(repr=False)
     FolderType: int = field(repr=False)
     SpecialFolderType: int = field(repr=False)
     Name: str
@@ -498,7 +556,7 @@ class OlkFolder:
                 #self.SyncMaps.append(block)
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkTask:
     # Outlook.sqlite fields
     RecordID: int
@@ -513,13 +571,13 @@ class OlkTask:
     UUID: bytes = field(repr=False)
     HasReminder: bool = field(repr=False)
     Name: str
-    CategoryID: int = field(repr=False)
+    CategoryIDs: list = field(repr=False)
     # DataFile attributes
     #data: dict = dataField()
     BlockType: str = dataField()
-    Body: str = field(init=False, repr=False)
-    CompletedDate: datetime = field(init=False, repr=False)
-    Reminder: datetime = field(init=False, repr=False)
+    Body: str = dataField()
+    CompletedDate: datetime = dataField()
+    Reminder: datetime = dataField()
 
     def add_data(self, data):
         # Copy remaining useful fields
@@ -529,7 +587,7 @@ class OlkTask:
         #self.data = data
 
         # Manipulate dates
-        epoch = datetime(2001, 1, 1, 0, 0, tzinfo=ZoneInfo('UTC'))
+        epoch = tz_epoch(2001, 'UTC')
         if self.DueDate == epoch:
             self.DueDate = None
         if self.StartDate == epoch:
@@ -543,7 +601,7 @@ class OlkTask:
         pass # No OwnedBlocks present for Tasks in my archive
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkNote:
     # Outlook.sqlite fields
     RecordID: int
@@ -554,7 +612,7 @@ class OlkNote:
     ExchangeChangeKey: str = field(repr=False)
     UUID: bytes = field(repr=False)
     Title: str
-    CategoryID: int = field(repr=False)
+    CategoryIDs: list = field(repr=False)
     # DataFile attributes
     #data: dict = dataField()
     BlockType: str = dataField()
@@ -574,20 +632,21 @@ class OlkNote:
     def to_file(self):
         out = '<HTML>\r<HEAD>\r'
         out += "<meta http-equiv='Content-Type' content='text/html; charset=utf-8'/>\r"
-        out += '<TITLE>' + self.Title + '</TITLE>\r'
+        out += '<TITLE>' + (self.Title or '') + '</TITLE>\r'
         out += '</HEAD>\r'
-        out += self.Body
+        if self.Body is not None:
+            out += str(self.Body)
         out += '\r</HTML>'
         return ('html', out)
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkInternetAddress:
     Type: str = field(repr=False)
     Address: str
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkContact:
     # Outlook.sqlite fields
     RecordID: int
@@ -601,11 +660,11 @@ class OlkContact:
     DueDate: datetime = field(repr=False)
     ExchangeID: str = field(repr=False)
     ExchangeChangeKey: str = field(repr=False)
-    FlagStatus: int = field(repr=False)
+    FlagStatus: str = field(repr=False)
     StartDate: datetime = field(repr=False)
     UUID: bytes = field(repr=False)
     HasReminder: bool = field(repr=False)
-    CategoryID: int = field(repr=False)
+    CategoryIDs: list = field(repr=False)
     # DataFile attributes
     #data: dict = dataField()
     BlockType: str = dataField()
@@ -689,7 +748,7 @@ class OlkContact:
     PictureFormat: str = dataField()
     # OwnedBlock attributes
     HasPicture: bool = field(default=False, init=False, repr=False)
-    PictureImageData: bytes = dataField()
+    PictureImageData: OlkPayload = dataField()
 
     def add_data(self, data):
         # Normalize useful fields
@@ -718,7 +777,7 @@ class OlkContact:
                 self.PictureImageData = block['FileData']
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkCategory:
     # Outlook.sqlite fields
     RecordID: int
@@ -726,7 +785,7 @@ class OlkCategory:
     Name: str
     IsLocalCategory: bool = field(repr=False)
     ExchangeGuid: str = field(repr=False)
-    BackgroundColor: str = field(repr=False)
+    BackgroundColor: int = field(repr=False)
     # DataFile attributes
     #data: dict = dataField()
     BlockType: str = dataField()
@@ -745,7 +804,7 @@ class OlkCategory:
         pass # No OwnedBlocks present for Categories in my archive
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkSignature:
     # Outlook.sqlite fields
     RecordID: int
@@ -767,7 +826,7 @@ class OlkSignature:
         pass # No OwnedBlocks present for Signatures in my archive
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkSavedSearch:
     # Outlook.sqlite fields
     RecordID: int
@@ -789,7 +848,7 @@ class OlkSavedSearch:
         pass # No OwnedBlocks present for Saved Searches in my archive
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkMain:
     # Outlook.sqlite fields
     RecordID: int
@@ -847,7 +906,7 @@ class OlkMain:
                 self.RecentAddresses = block['RecentAddresses']
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkAccountMail:
     # Outlook.sqlite fields
     RecordID: int
@@ -885,7 +944,7 @@ class OlkAccountMail:
         pass # No OwnedBlocks present for Mail Accounts in my archive
 
 
-@dataclass
+@dataclass(slots=True)
 class OlkAccountExchange:
     # Outlook.sqlite fields
     RecordID: int
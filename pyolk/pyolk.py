@@ -1,45 +1,168 @@
 import os
 import json
 import sqlite3
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from itertools import chain, groupby, islice
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter
 from os.path import expanduser
-from zoneinfo import ZoneInfo
 from datetime import date, datetime
 
-from datafiles import OlkDataFile
+from cache import OlkCache
+from columnar import write_columnar
+from mailboxes import MAILBOXES
+from search import OlkSearchIndex
+from datafiles import OlkBlock, parse_data_file, parse_data_file_worker
 from mailobjects import *
+from stats import OlkStats, OlkUnmappedKeys
 from utils import *
 
-class PyOLKReader:
-    PATH = '/Library/Group Containers/UBF8T346G9.Office/Outlook/Outlook 15 Profiles/Main Profile/Data'
-    tables = list()
+class OlkItems(Mapping):
+    """Mapping of RecordID -> item for one table, loaded on first access"""
+
+    def __init__(self, reader, table, select_query, ItemClass):
+        self.reader = reader
+        self.table = table
+        self.select_query = select_query
+        self.ItemClass = ItemClass
+        self._items = dict()
+        self._record_ids = None
+
+    def __getitem__(self, record_id):
+        if record_id not in self._items:
+            item = self.reader._get_item(
+                self.table, self.select_query, self.ItemClass, record_id
+                )
+            if item is None:
+                raise KeyError(record_id)
+            self._items[record_id] = item
+        return self._items[record_id]
+
+    def __contains__(self, record_id):
+        return record_id in self.record_ids()
+
+    def __iter__(self):
+        return iter(self.record_ids())
+
+    def __len__(self):
+        return len(self.record_ids())
+
+    def record_ids(self):
+        # Only the RecordID column is read from Outlook.sqlite
+        if self._record_ids is None:
+            cur = self.reader.db.execute(
+                f"SELECT RecordID FROM ({self.select_query})"
+                )
+            self._record_ids = dict.fromkeys(r['RecordID'] for r in cur)
+        return self._record_ids
+
+
+class OlkWriter(Thread):
+    """Thread writing rendered export files from a bounded queue"""
+
+    def __init__(self, size, written):
+        super().__init__(daemon=True)
+        self.queue = Queue(size)
+        self.written = written
+        self.error = None
+
+    def run(self):
+        # Keep draining the queue after an error so the exporter can't block,
+        # the error is raised once all the writers are done
+        while (job := self.queue.get()) is not None:
+            if self.error is None:
+                try:
+                    write_file(*job)
+                except Exception as e:
+                    self.error = e
+            self.written()
 
-    def __init__(self, path=None, mytz=None):
-        # Save current directory
-        cwd = os.getcwd()
 
-        # Get path to Outlook cache
+class PyOLKReader:
+    PATH = '/Library/Group Containers/UBF8T346G9.Office/Outlook/Outlook 15 Profiles/Main Profile/Data'
+    # Data files per worker process in each batch, when using a pool
+    BATCH_SIZE = 256
+    # Threads writing exported files, and files queued for each
+    WRITER_THREADS = 4
+    WRITER_QUEUE = 64
+    # Outlook.sqlite columns converted when items are built
+    BOOL_COLUMNS = frozenset([
+        'IsRecurring', 'Completed', 'HasReminder', 'HasAttachment',
+        'Hidden', 'IsOutgoingMessage', 'MarkedForDelete', 'MentionedMe',
+        'PartiallyDownloaded', 'ReadFlag', 'Sent', 'SuppressAutoBackfill',
+        'IsLocalCategory'
+        ])
+    DT_WIN_COLUMNS = frozenset(['StartDateUTC', 'EndDateUTC'])
+    DT_TS_COLUMNS = frozenset([
+        'ModDate', 'DueDate', 'StartDate', 'TimeReceived', 'TimeSent'
+        ])
+
+    def __init__(self, path=None, mytz=None, lazy=False, workers=None,
+                 cache=None, since=None, stats=None, fields=None,
+                 deferred=None, metadata_only=False, checkpoint=False):
+        # Get path to Outlook cache, all data file paths are relative to it
         mypath = expanduser('~') + self.PATH
-        os.chdir(path or mypath)
+        self.path = os.path.abspath(path or mypath)
 
         # Set default timezone
         self.localtime = ZoneInfo(mytz or 'US/Eastern')
 
         # Connect to Outlook sqlite db
-        db = sqlite3.connect('Outlook.sqlite')
-        db.row_factory = sqlite3.Row
-        self.cur = db.cursor()
+        self.db = sqlite3.connect(os.path.join(self.path, 'Outlook.sqlite'))
+        self.db.row_factory = sqlite3.Row
+        self.cur = self.db.cursor()
 
         # Get list of tables that are present in sqlite db
         self.cur.execute("SELECT name FROM sqlite_schema WHERE type ='table';")
-        for r in self.cur.fetchall():
-            self.tables.append(r['name'])
-
-        # Load the archive
+        self.tables = [r['name'] for r in self.cur.fetchall()]
+
+        # Load the archive, or just set up views in lazy mode, in which case
+        # data files are only parsed when an item is first accessed
+        self.lazy = lazy
+        # Data files can be parsed by a pool of worker processes
+        self.workers = workers or 1
+        self.pool = None
+        # Parsed data files can be kept in an OlkCache between runs, either
+        # pass one in or the path to its sqlite file
+        if isinstance(cache, str):
+            cache = OlkCache(cache)
+        self.cache = cache
+        # Only load records modified since an earlier checkpoint(), either
+        # the checkpoint itself or the path to one saved with save_checkpoint
+        if isinstance(since, str):
+            with open(since) as f:
+                since = json.load(f)
+        self.since = since
+        # Note where the archive is up to before loading it, for checkpoint(),
+        # otherwise that's only looked up when it's first asked for
+        self._checkpoint = None
+        self._take_checkpoint_first = checkpoint
+        # Timers and counters for each stage, either pass in an OlkStats or
+        # True for a new one, off by default
+        if stats is True:
+            stats = OlkStats()
+        self.stats = stats or None
+        # Keys in data files that the schemas don't know about, with counts
+        self.unmapped = OlkUnmappedKeys()
+        # Only parse these data file fields (e.g. ['Subject', 'From', 'To']),
+        # Outlook.sqlite columns are always loaded. Other fields are left as
+        # their defaults, and projected data files aren't added to the cache
+        self.fields = None if fields is None else frozenset(fields)
+        # Leave these text fields (or DEFERRED_FIELDS for True) in the data
+        # files as OlkPayloads until they're read, also not added to the cache
+        self.deferred = deferred
+        # Only build items from their Outlook.sqlite rows, without opening
+        # data files or blocks, so fields that are only in them keep their
+        # defaults
+        self.metadata_only = metadata_only
+        # Full-text index, set up by index()
+        self.search_index = None
         self.load_archive()
 
-        # Return to original directory
-        os.chdir(cwd)
-
     def get_items(self):
         # Return a list of all archived items, regardless of type
         return list(self.Messages.values()) + \
@@ -57,86 +180,400 @@ class PyOLKReader:
 
     def load_archive(self):
         # My archive missing: AccountsLdap, Rules
-        t, q = self._mail_query()
-        self.Messages = self._get_items(t, q, OlkMessage)
-        
-        t, q = self._calendar_event_query()
-        self.Events = self._get_items(t, q, OlkEvent)
-
-        t, q = self._folder_query()
-        self.Folders = self._get_items(t, q, OlkFolder)
-
-        t, q = self._note_query()
-        self.Notes = self._get_items(t, q, OlkNote)
-
-        t, q = self._task_query()
-        self.Tasks = self._get_items(t, q, OlkTask)
-
-        t, q = self._contact_query()
-        self.Contacts = self._get_items(t, q, OlkContact)
-
-        t, q = self._category_query()
-        self.Categories = self._get_items(t, q, OlkCategory)
-
-        t, q = self._signature_query()
-        self.Signatures = self._get_items(t, q, OlkSignature)
-
-        t, q = self._search_query()
-        self.SavedSearches = self._get_items(t, q, OlkSavedSearch)
-
-        t, q = self._main_query()
-        self.Mains = self._get_items(t, q, OlkMain)
-
-        t, q = self._acctmail_query()
-        self.AccountsMail = self._get_items(t, q, OlkAccountMail)
+        # Each load gets its own allowance of repeated log messages
+        log_limit.reset()
+        # Note where the archive is up to before loading it, and which
+        # records were deleted since the last checkpoint, only if needed as
+        # it reads every RecordID
+        if self.since is not None or self._take_checkpoint_first:
+            self._checkpoint = self._take_checkpoint()
+        self.Deleted = dict()
+        if self.since is not None:
+            for name, current in self._checkpoint.items():
+                previous = self.since.get(name, dict()).get('RecordIDs', list())
+                self.Deleted[name] = set(previous) - set(current['RecordIDs'])
+        with self._timer('load'), self._parallel():
+            for name, query, ItemClass in self._collections():
+                t, q = query()
+                q = self._changed_query(name, q)
+                if self.lazy:
+                    setattr(self, name, OlkItems(self, t, q, ItemClass))
+                else:
+                    setattr(self, name, self._get_items(t, q, ItemClass))
+        if self.cache is not None:
+            self.cache.commit()
+        self.unmapped.log_summary()
+
+    def checkpoint(self):
+        # Latest ModDate and all RecordIDs of each table as of loading (with
+        # checkpoint=True or since=, otherwise as of the first call), pass
+        # this as since= to only load what's changed since
+        if self._checkpoint is None:
+            self._checkpoint = self._take_checkpoint()
+        return self._checkpoint
+
+    def save_checkpoint(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.checkpoint(), f)
+
+    def index(self, path):
+        # Build or update a full-text index of messages and events, either the
+        # path to its sqlite file or an OlkSearchIndex. Only records whose
+        # ModDate has changed since they were indexed are loaded (from memory
+        # if they already are), and deleted records are dropped
+        # Returns the number of records (re)indexed
+        index = OlkSearchIndex(path) if isinstance(path, str) else path
+        self.search_index = index
+        count = 0
+        for name, query, ItemClass in self._collections():
+            if ItemClass not in (OlkMessage, OlkEvent):
+                continue
+            t, q = query()
+            indexed = index.moddates(name)
+            current = dict(self.db.execute(f"SELECT RecordID, ModDate FROM ({q})"))
+            for record_id in indexed.keys() - current.keys():
+                index.remove(name, record_id)
+            changed = [r for r, m in current.items() if indexed.get(r) != m]
+            for item in self._load_records(name, t, q, ItemClass, changed):
+                index.add(name, item, current[item.RecordID])
+                count += 1
+        index.commit()
+        return count
+
+    def search(self, query, limit=20, types=None):
+        # Items matching an FTS5 query (e.g. 'invoice', 'Subject:budget',
+        # 'alice NEAR bob'), best match first. Needs index() to be run first.
+        # Only the matching items are loaded, in lazy mode. Matches are looked
+        # up in the whole table, not just the records loaded with since=
+        if self.search_index is None:
+            raise ValueError('No search index, call index() first')
+        names = None
+        if types is not None:
+            names = [n for n, _, c in self._collections() if c in types]
+        hits = self.search_index.search(query, limit, names)
+        items = dict()
+        for name, table_query, ItemClass in self._collections():
+            record_ids = [r for n, r, _ in hits if n == name]
+            if not record_ids:
+                continue
+            t, q = table_query()
+            for item in self._load_records(name, t, q, ItemClass, record_ids):
+                items[(name, item.RecordID)] = item
+        # Records deleted since they were indexed are left out
+        return [items[(n, r)] for n, r, _ in hits if (n, r) in items]
+
+    def close(self):
+        # Close Outlook.sqlite, and save and close the cache and search index
+        self.unmapped.log_summary()
+        if self.search_index is not None:
+            self.search_index.close()
+        if self.cache is not None:
+            self.cache.close()
+        self.db.close()
+
+    def _collections(self):
+        # Attribute name, query and item class for each archived table
+        return [
+            ('Messages', self._mail_query, OlkMessage),
+            ('Events', self._calendar_event_query, OlkEvent),
+            ('Folders', self._folder_query, OlkFolder),
+            ('Notes', self._note_query, OlkNote),
+            ('Tasks', self._task_query, OlkTask),
+            ('Contacts', self._contact_query, OlkContact),
+            ('Categories', self._category_query, OlkCategory),
+            ('Signatures', self._signature_query, OlkSignature),
+            ('SavedSearches', self._search_query, OlkSavedSearch),
+            ('Mains', self._main_query, OlkMain),
+            ('AccountsMail', self._acctmail_query, OlkAccountMail),
+            ('AccountsExchange', self._acctexch_query, OlkAccountExchange),
+            ]
 
-        t, q = self._acctexch_query()
-        self.AccountsExchange = self._get_items(t, q, OlkAccountExchange)
+    def iter_items(self, types=None, folder=None):
+        # Stream archived items one at a time, optionally only the given
+        # item classes and/or the items in one folder (by FolderID)
+        with self._parallel():
+            for name, query, ItemClass in self._collections():
+                if types is not None and ItemClass not in types:
+                    continue
+                t, q = query()
+                q = self._changed_query(name, q)
+                yield from self._iter_items(t, q, ItemClass, folder)
+        if self.cache is not None:
+            self.cache.commit()
+        self.unmapped.log_summary()
+
+    def _load_records(self, name, table, select_query, ItemClass, record_ids):
+        # Items for the given RecordIDs, using already loaded items where
+        # possible, and streaming the rest from their data files
+        loaded = dict() if self.lazy else getattr(self, name)
+        missing = list()
+        for record_id in record_ids:
+            if record_id in loaded:
+                yield loaded[record_id]
+            else:
+                missing.append(record_id)
+        if missing:
+            ids = ','.join(str(int(r)) for r in missing)
+            query = f"SELECT * FROM ({select_query}) WHERE RecordID IN ({ids})"
+            with self._parallel():
+                yield from self._iter_items(table, query, ItemClass)
+            if self.cache is not None:
+                self.cache.commit()
 
     def _get_items(self, table, select_query, ItemClass):
         # Load all the archived items in a particular table,
         # using the provided ItemClass
-        self.cur.execute(select_query)
         items = dict()
-        for row in self.cur.fetchall():
-            data = self._process_record(dict(row))
-            path_to_item = data.pop('PathToDataFile').replace('%20', ' ')
-            item = ItemClass(**data)
-            item.add_data(OlkDataFile(path_to_item).data())
-            if table + '_OwnedBlocks' in self.tables:
-                blocks = list()
-                self.cur.execute(self._block_query(table), (item.RecordID,))
-                for x in self.cur.fetchall():
-                    path_to_block = x['PathToDataFile'].replace('%20', ' ')
-                    blocks.append(OlkDataFile(path_to_block).data())
-                item.add_blockdata(blocks)
+        for item in self._iter_items(table, select_query, ItemClass):
             items[item.RecordID] = item
         return items
 
-    ### Get columns from Outlook.sqlite database
-    def _process_record(self, r):
-        bool_cols = [
-            'IsRecurring', 'Completed', 'HasReminder', 'HasAttachment',
-            'Hidden', 'IsOutgoingMessage', 'MarkedForDelete', 'MentionedMe',
-            'PartiallyDownloaded', 'ReadFlag', 'Sent', 'SuppressAutoBackfill',
-            'IsLocalCategory'
-            ]
-        for k in bool_cols:
-            if k in r:
-                r[k] = r[k] == 1
+    def _iter_items(self, table, select_query, ItemClass, folder=None):
+        # Rows are read from the cursor as they're needed, rather than with
+        # fetchall(), so only one item is held in memory at a time
+        query = f"SELECT * FROM ({select_query})"
+        params = tuple()
+        columns = self._columns(select_query)
+        if folder is not None:
+            if 'FolderID' not in columns:
+                return
+            query += " WHERE FolderID = ?"
+            params = (folder,)
+        converters = self._record_converters(columns)
+        # Rows are sorted so they can be matched up with their blocks
+        cur = self._execute(query + " ORDER BY RecordID", params)
+        if self.metadata_only:
+            for row in cur:
+                yield self._build_item(table, row, ItemClass, converters)
+            return
+        rows = self._match_blocks(table, cur, query, params)
+
+        # With a process pool, data files are parsed a batch at a time, and
+        # items are built from the results in record order
+        if self.pool is None:
+            for row, blocks in rows:
+                yield self._build_item(
+                    table, row, ItemClass, converters, blocks=blocks
+                    )
+            return
+        while batch := list(islice(rows, self.workers * self.BATCH_SIZE)):
+            paths = [self._data_path(r['PathToDataFile']) for r, _ in batch]
+            for (row, blocks), data in zip(batch, self._parse_batch(paths)):
+                yield self._build_item(
+                    table, row, ItemClass, converters, data, blocks
+                    )
+
+    def _parse_batch(self, paths):
+        # Parse a batch of data files in the pool, skipping cached ones
+        cached = [None] * len(paths)
+        if self.cache is not None:
+            cached = [self.cache.get(path) for path in paths]
+        missing = [path for path, data in zip(paths, cached) if data is None]
+        # Workers send back their unmapped keys and stats with each data file
+        parse = partial(
+            parse_data_file_worker, stats=self.stats is not None,
+            fields=self.fields, deferred=self.deferred
+            )
+        parsed = self.pool.map(parse, missing, chunksize=self.BATCH_SIZE // 4)
+        for path, data in zip(paths, cached):
+            if data is None:
+                data, stats, unmapped = next(parsed)
+                if stats is not None:
+                    self.stats.merge(stats)
+                if unmapped is not None:
+                    self.unmapped.merge(unmapped)
+                if self.cache is not None and self._cacheable():
+                    self.cache.put(path, data)
+            yield data
+
+    def _parse(self, path):
+        # Parse one data file, using the cache if there is one. Cached data
+        # has every field, so it can be used for projections too
+        if self.cache is not None:
+            if self._cacheable():
+                return self.cache.parse(path, self.stats, self.unmapped)
+            data = self.cache.get(path)
+            if data is not None:
+                return data
+        return parse_data_file(
+            path, self.stats, self.unmapped, self.fields, self.deferred
+            )
 
-        dt_win_cols = ['StartDateUTC', 'EndDateUTC']
-        for k in dt_win_cols:
-            if k in r:
-                r[k] = dt_winminutes(r[k])
+    def _cacheable(self):
+        # Only fully parsed data files go in the cache
+        return self.fields is None and not self.deferred
+
+    def _match_blocks(self, table, rows, query, params):
+        # Pair each row with the paths of the blocks its record owns, using
+        # one query per table, sorted by RecordID like the rows themselves
+        if table + '_OwnedBlocks' not in self.tables:
+            for row in rows:
+                yield row, None
+            return
+        cur = self._execute(self._owned_blocks_query(table, query), params)
+        groups = groupby(cur, lambda r: r['RecordID'])
+        group = next(groups, None)
+        for row in rows:
+            while group and group[0] < row['RecordID']:
+                group = next(groups, None)
+            paths = list()
+            if group and group[0] == row['RecordID']:
+                paths = [self._data_path(b['PathToDataFile']) for b in group[1]]
+                group = next(groups, None)
+            yield row, paths
+
+    def _timer(self, stage):
+        # Time a stage if there are stats, otherwise do nothing
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.timer(stage)
+
+    def _execute(self, query, params=tuple()):
+        # Run a query on Outlook.sqlite, with stats the time spent running it
+        # and fetching its rows counts towards the 'query' stage
+        if self.stats is None:
+            return self.db.execute(query, params)
+        with self.stats.timer('query'):
+            cur = self.db.execute(query, params)
+        return self._timed_rows(cur)
+
+    def _timed_rows(self, cur):
+        while True:
+            start = perf_counter()
+            row = next(cur, None)
+            self.stats.add_time('query', perf_counter() - start, 0)
+            if row is None:
+                return
+            yield row
+
+    @contextmanager
+    def _parallel(self):
+        # Share one process pool across all the tables being loaded, there's
+        # nothing for it to do with metadata_only
+        if self.workers <= 1 or self.pool is not None or self.metadata_only:
+            yield
+            return
+        with ProcessPoolExecutor(self.workers) as self.pool:
+            try:
+                yield
+            finally:
+                self.pool = None
+
+    def _take_checkpoint(self):
+        checkpoint = dict()
+        for name, query, _ in self._collections():
+            _, q = query()
+            if 'ModDate' not in self._columns(q):
+                continue
+            moddates = dict(
+                self.db.execute(f"SELECT RecordID, ModDate FROM ({q})")
+                )
+            checkpoint[name] = {
+                'ModDate': max(moddates.values(), default=None),
+                'RecordIDs': sorted(moddates),
+                }
+        return checkpoint
+
+    def _changed_query(self, name, select_query):
+        # With since=, only select records modified at or after the last
+        # checkpoint (ModDate is in whole seconds, so records modified in the
+        # same second as the checkpoint are loaded again rather than missed)
+        # Folders are always loaded in full, since exports need their paths
+        if self.since is None or name == 'Folders':
+            return select_query
+        moddate = self.since.get(name, dict()).get('ModDate')
+        if moddate is None:
+            return select_query
+        return f"SELECT * FROM ({select_query}) WHERE ModDate >= {float(moddate)!r}"
+
+    def _columns(self, select_query):
+        cur = self.db.execute(f"SELECT * FROM ({select_query}) LIMIT 0")
+        return [d[0] for d in cur.description]
+
+    def _get_item(self, table, select_query, ItemClass, record_id):
+        # Load a single archived item by RecordID, or None if it's missing
+        row = next(self._execute(
+            f"SELECT * FROM ({select_query}) WHERE RecordID = ?", (record_id,)
+            ), None)
+        if row is None:
+            return None
+        converters = self._record_converters(row.keys())
+        return self._build_item(table, row, ItemClass, converters)
+
+    def _build_item(self, table, row, ItemClass, converters, parsed=None,
+                    blocks=None):
+        # Create an item from its Outlook.sqlite row, then add the contents
+        # of its data file and any blocks it owns, unless these have already
+        # been parsed / looked up. converters are the query's column
+        # conversions, from _record_converters
+        # With stats, parsing and block queries aren't counted as 'build'
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+        data = self._process_record(dict(row), converters)
+        path_to_item = self._data_path(data.pop('PathToDataFile'))
+        item = ItemClass(**data)
+        if self.metadata_only:
+            if stats is not None:
+                stats.add_time('build', perf_counter() - start)
+                stats.records[ItemClass.__name__] += 1
+            return item
+        if parsed is None:
+            if stats is not None:
+                stats.add_time('build', perf_counter() - start, 0)
+            parsed = self._parse(path_to_item)
+            if stats is not None:
+                start = perf_counter()
+        item.add_data(parsed)
+        if table + '_OwnedBlocks' in self.tables:
+            if blocks is None:
+                if stats is not None:
+                    stats.add_time('build', perf_counter() - start, 0)
+                cur = self._execute(self._block_query(table), (item.RecordID,))
+                blocks = [self._data_path(x['PathToDataFile']) for x in cur]
+                if stats is not None:
+                    start = perf_counter()
+            # Block files are only parsed if add_blockdata needs their contents,
+            # and time spent parsing them counts as 'parse' rather than 'build'
+            blocks = [OlkBlock(path, stats, self.unmapped) for path in blocks]
+            if stats is None:
+                item.add_blockdata(blocks)
+            else:
+                parsing = stats.timers['parse'][0]
+                item.add_blockdata(blocks)
+                start += stats.timers['parse'][0] - parsing
+        if stats is not None:
+            stats.add_time('build', perf_counter() - start)
+            stats.records[ItemClass.__name__] += 1
+        return item
 
-        dt_ts_cols = [
-            'ModDate', 'DueDate', 'StartDate', 'TimeReceived', 'TimeSent'
-            ]
-        for k in dt_ts_cols:
-            if k in r:
-                r[k] = datetime.fromtimestamp(r[k]).replace(tzinfo=self.localtime)
+    def _data_path(self, path):
+        # Data file paths in Outlook.sqlite are relative to the profile
+        return os.path.join(self.path, path.replace('%20', ' '))
 
+    ### Get columns from Outlook.sqlite database
+    def _record_converters(self, columns):
+        # Conversions for the columns of one query, worked out once and then
+        # applied to each of its rows by _process_record
+        localtime = self.localtime
+        converters = list()
+        for k in columns:
+            if k in self.BOOL_COLUMNS:
+                converters.append((k, lambda v: v == 1))
+            elif k in self.DT_WIN_COLUMNS:
+                converters.append((k, dt_winminutes))
+            elif k in self.DT_TS_COLUMNS:
+                converters.append((k, lambda v: datetime.fromtimestamp(v)
+                                   .replace(tzinfo=localtime)))
+            # Category IDs are concatenated by the query, one row per record
+            elif k == 'CategoryIDs':
+                converters.append((k, lambda v: sorted(map(int, v.split(',')))
+                                   if v else list()))
+        return converters
+
+    def _process_record(self, r, converters):
+        for k, convert in converters:
+            r[k] = convert(r[k])
         return r
 
     def _mail_query(self):
@@ -176,10 +613,10 @@ class PyOLKReader:
                  Record_Priority AS Priority,
                  Record_HasReminder AS HasReminder,
                  Message_InferenceClassification AS InferenceClassification,
-                 c.Category_RecordID AS CategoryID
+                 group_concat(c.Category_RecordID) AS CategoryIDs
             FROM Mail m
-              LEFT JOIN Mail_Categories c
-                ON m.Record_RecordID = c.Record_RecordID""")
+              LEFT JOIN Mail_Categories c ON c.Record_RecordID = m.Record_RecordID
+            GROUP BY m.Record_RecordID""")
 
     def _calendar_event_query(self):
         return ('CalendarEvents', """
@@ -195,14 +632,13 @@ class PyOLKReader:
                  Calendar_AllowNewTimeProposal AS AllowNewTimeProposal,
                  Record_UUID AS UUID,
                  Calendar_HasReminder AS HasReminder,
-                 Calendar_IsRecurring AS IsRecurring,
                  Calendar_MasterRecordID AS MasterRecordID,
                  Record_ExchangeOrEasId AS ExchangeID,
                  Record_ExchangeChangeKey AS ExchangeChangeKey,
-                 c.Category_RecordID AS CategoryID
+                 group_concat(c.Category_RecordID) AS CategoryIDs
             FROM CalendarEvents e
-              LEFT JOIN CalendarEvents_Categories c
-                ON e.Record_RecordID = c.Record_RecordID""")
+              LEFT JOIN CalendarEvents_Categories c ON c.Record_RecordID = e.Record_RecordID
+            GROUP BY e.Record_RecordID""")
 
     def _folder_query(self):
         return ('Folders', """
@@ -238,10 +674,10 @@ class PyOLKReader:
                  Record_HasReminder AS HasReminder,
                  Record_UUID AS UUID,
                  Task_Name AS Name,
-                 c.Category_RecordID AS CategoryID
+                 group_concat(c.Category_RecordID) AS CategoryIDs
             FROM Tasks t
-              LEFT JOIN Tasks_Categories c
-                ON t.Record_RecordID = c.Record_RecordID""")
+              LEFT JOIN Tasks_Categories c ON c.Record_RecordID = t.Record_RecordID
+            GROUP BY t.Record_RecordID""")
 
     def _note_query(self):
         return ('Notes', """
@@ -253,10 +689,10 @@ class PyOLKReader:
                  Record_ExchangeChangeKey AS ExchangeChangeKey,
                  Record_UUID AS UUID,
                  Note_Title AS Title,
-                 c.Category_RecordID AS CategoryID
+                 group_concat(c.Category_RecordID) AS CategoryIDs
             FROM Notes n
-              LEFT JOIN Notes_Categories c
-                ON n.Record_RecordID = c.Record_RecordID""")
+              LEFT JOIN Notes_Categories c ON c.Record_RecordID = n.Record_RecordID
+            GROUP BY n.Record_RecordID""")
 
     def _contact_query(self):
         return ('Contacts', """
@@ -275,10 +711,10 @@ class PyOLKReader:
                  Record_StartDate AS StartDate,
                  Record_UUID AS UUID,
                  Record_HasReminder AS HasReminder,
-                 cat.Category_RecordID AS CategoryID
+                 group_concat(cat.Category_RecordID) AS CategoryIDs
             FROM Contacts c
-              LEFT JOIN Contacts_Categories cat
-                ON c.Record_RecordID = cat.Record_RecordID""")
+              LEFT JOIN Contacts_Categories cat ON cat.Record_RecordID = c.Record_RecordID
+            GROUP BY c.Record_RecordID""")
 
     def _category_query(self):
         return ('Categories', """
@@ -333,33 +769,188 @@ class PyOLKReader:
                 AND b.BlockID = ob.BlockID
             WHERE ob.Record_RecordID = ?"""
 
+    def _owned_blocks_query(self, table, query):
+        return f"""
+            SELECT ob.Record_RecordID AS RecordID, b.PathToDataFile
+            FROM Blocks b
+              JOIN {table}_OwnedBlocks ob ON b.BlockTag = ob.BlockTag
+                AND b.BlockID = ob.BlockID
+            WHERE ob.Record_RecordID IN (SELECT RecordID FROM ({query}))
+            ORDER BY ob.Record_RecordID"""
+
     
     ### EXPORT ###
-    def export(self, path='Recovered Outlook Data'):
-        # Make folders
-        if path:
-            if not os.path.exists(path):
-                os.mkdir(path)
-            os.chdir(path)
-        paths = self._build_folders()
-        os.makedirs('Categories', exist_ok=True)
-        os.makedirs('SavedSearches', exist_ok=True)
-        os.makedirs('Signatures', exist_ok=True)
-
-        # Write files
-        _ = [export(x, '') for x in self.Mains.values()]
-        _ = [export(x, '') for x in self.AccountsExchange.values()]
-        _ = [export(x, '') for x in self.AccountsMail.values()]
-        _ = [export(x, 'Categories') for x in self.Categories.values()]
-        _ = [export(x, 'SavedSearches') for x in self.SavedSearches.values()]
-        _ = [export(x, 'Signatures') for x in self.Signatures.values()]
-        _ = [export(x, paths[x.RecordID]) for x in self.Folders.values()]
-        _ = [export(x, paths[x.FolderID]) for x in self.Notes.values()]
-        _ = [export(x, paths[x.FolderID]) for x in self.Events.values()]
-        _ = [export(x, paths[x.FolderID]) for x in self.Messages.values()]
-
-    def _build_folders(self):
-        # Get paths from folder structure
+    def export(self, path='Recovered Outlook Data', workers=None, progress=None):
+        # Make folders, everything is written under path (or the current
+        # directory if it's empty)
+        root = os.path.abspath(path)
+        paths = self._build_folders(root)
+        for folder in ('Categories', 'SavedSearches', 'Signatures'):
+            paths[folder] = os.path.join(root, folder)
+            os.makedirs(paths[folder], exist_ok=True)
+
+        # Files to write, as (item, folder path)
+        exports = [
+            ('Mains', OlkMain, lambda x: root),
+            ('AccountsExchange', OlkAccountExchange, lambda x: root),
+            ('AccountsMail', OlkAccountMail, lambda x: root),
+            ('Categories', OlkCategory, lambda x: paths['Categories']),
+            ('SavedSearches', OlkSavedSearch, lambda x: paths['SavedSearches']),
+            ('Signatures', OlkSignature, lambda x: paths['Signatures']),
+            ('Folders', OlkFolder, lambda x: paths[x.RecordID]),
+            ('Notes', OlkNote, lambda x: paths[x.FolderID]),
+            ('Events', OlkEvent, lambda x: paths[x.FolderID]),
+            ('Messages', OlkMessage, lambda x: paths[x.FolderID]),
+            ]
+        total = sum(len(getattr(self, name)) for name, _, _ in exports)
+        jobs = chain.from_iterable(
+            ((x, folder(x)) for x in self._export_items(name, ItemClass))
+            for name, ItemClass, folder in exports
+            )
+
+        # Write files, optionally rendering them in a pool of worker processes
+        # progress is called with the number of files written and the total
+        # With stats, serial exports time rendering and writing separately
+        # In lazy mode, the parsing pool is started first so it isn't forked
+        # once the writer threads are running
+        workers = workers or self.workers
+        with self._timer('export'), self._export_parallel_parse():
+            if workers <= 1:
+                for i, (x, folder) in enumerate(jobs, 1):
+                    if self.stats is None:
+                        export(x, folder)
+                    else:
+                        with self.stats.timer('render'):
+                            rendered = render_file(x)
+                        with self.stats.timer('write'):
+                            write_file(folder, *rendered)
+                    if progress is not None:
+                        progress(i, total)
+            else:
+                self._export_parallel(jobs, total, workers, progress)
+
+    def export_columnar(self, path='Recovered Outlook Data', format='parquet',
+                        types=None, columns=None):
+        # Write each table to a single Parquet (or Arrow IPC, with
+        # format='arrow') file in path, optionally only the given item
+        # classes and field names. Returns the number of items per table
+        os.makedirs(path, exist_ok=True)
+        written = dict()
+        with self._export_parallel_parse():
+            for name, _, ItemClass in self._collections():
+                if types is not None and ItemClass not in types:
+                    continue
+                filename = os.path.join(path, name + '.' + format)
+                with self._timer('export_columnar'):
+                    written[name] = write_columnar(
+                        self._export_items(name, ItemClass), ItemClass,
+                        filename, format, columns
+                        )
+        return written
+
+    def export_mailboxes(self, path='Recovered Outlook Data', format='mbox'):
+        # Write each folder's messages to a single mbox file (named after the
+        # folder, next to its subfolders), or to a Maildir with format=
+        # 'maildir', instead of one .eml file per message. Messages with a
+        # MessageSource are written as-is. Folders without messages are
+        # skipped. Returns the number of messages written per FolderID
+        Mailbox = MAILBOXES[format]
+        root = os.path.abspath(path)
+        paths = self._build_folders(root, make=False)
+
+        # In lazy mode, stream each folder's messages from their data files
+        if self.lazy:
+            messages = lambda f: self.iter_items(types=[OlkMessage], folder=f)
+        else:
+            by_folder = dict()
+            for msg in self.Messages.values():
+                by_folder.setdefault(msg.FolderID, list()).append(msg)
+            messages = lambda f: by_folder.get(f, list())
+
+        # Parent folders go first, so a Maildir's subfolders go inside it. In
+        # lazy mode, one pool parses the data files of all the folders
+        written = dict()
+        folders = sorted(paths.items(), key=lambda x: x[1])
+        with self._export_parallel_parse():
+            for folder, folder_path in folders:
+                box = None
+                try:
+                    for msg in messages(folder):
+                        if box is None:
+                            parent = os.path.dirname(folder_path)
+                            os.makedirs(parent, exist_ok=True)
+                            if format == 'mbox':
+                                box = Mailbox(folder_path + '.mbox')
+                            else:
+                                box = Mailbox(folder_path)
+                            written[folder] = 0
+                        with self._timer('export_mailboxes'):
+                            box.add(msg)
+                        written[folder] += 1
+                finally:
+                    if box is not None:
+                        box.close()
+        return written
+
+    def _export_items(self, name, ItemClass):
+        # Items of one table to export. In lazy mode they're streamed from
+        # Outlook.sqlite with their blocks, rather than each looked up (and
+        # then kept) by the table's OlkItems
+        if self.lazy:
+            return self.iter_items(types=[ItemClass])
+        return getattr(self, name).values()
+
+    def _export_parallel_parse(self):
+        # One pool to parse the data files of all the tables being exported,
+        # which are only parsed during the export in lazy mode
+        return self._parallel() if self.lazy else nullcontext()
+
+    def _export_parallel(self, jobs, total, workers, progress):
+        # Files are rendered in batches by the pool, and written by a few
+        # threads so slow writes overlap with rendering. The writer queues are
+        # bounded, so rendering can't get too far ahead. Each file goes to a
+        # writer picked by its path, so if two items share a file name
+        # they're still written in order, same as a serial export
+        written = 0
+        lock = Lock()
+        def count():
+            nonlocal written
+            with lock:
+                written += 1
+                if progress is not None:
+                    progress(written, total)
+
+        writers = list()
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                while batch := list(islice(jobs, workers * self.BATCH_SIZE)):
+                    rendered = pool.map(
+                        render_file, [x for x, _ in batch],
+                        chunksize=self.BATCH_SIZE // 4
+                        )
+                    # Only start the writers once the pool's processes have
+                    # been forked, so they aren't forked with threads running
+                    if not writers:
+                        writers = [
+                            OlkWriter(self.WRITER_QUEUE, count)
+                            for _ in range(self.WRITER_THREADS)
+                            ]
+                        for writer in writers:
+                            writer.start()
+                    for (_, folder), (name, ext, data) in zip(batch, rendered):
+                        writer = writers[hash((folder, name, ext)) % len(writers)]
+                        writer.queue.put((folder, name, ext, data))
+        finally:
+            for writer in writers:
+                writer.queue.put(None)
+            for writer in writers:
+                writer.join()
+        for writer in writers:
+            if writer.error is not None:
+                raise writer.error
+
+    def _build_folders(self, root, make=True):
+        # Get paths from folder structure, under root
         parents = {f.RecordID: f.ParentID for f in self.Folders.values()}
         roots = set(f for f in parents.values() if f not in set(parents.keys()))
         paths = dict()
@@ -375,11 +966,11 @@ class PyOLKReader:
                 else:
                     fldr = self.Folders[i]
                     names.append((fldr.Name or str(fldr.RecordID)).replace('/', ''))
-            names = '/'.join(names)
-            paths[node] = names
+            paths[node] = os.path.join(root, *names)
 
         # Make folders
-        for path in paths.values():
-            os.makedirs(path, exist_ok=True)
+        if make:
+            for path in paths.values():
+                os.makedirs(path, exist_ok=True)
 
         return paths
@@ -0,0 +1,142 @@
+"""Full-text search index of archived messages and events"""
+
+import sqlite3
+
+from bs4 import BeautifulSoup
+
+from mailobjects import OlkEvent, OlkMessage
+
+
+class OlkSearchIndex:
+    """SQLite FTS5 sidecar with the subject, body text, addresses and location
+    of each message and event, and the ModDate it was indexed at, so it can
+    be kept up to date incrementally"""
+    # Bump when what's indexed changes, to rebuild the index
+    VERSION = 1
+    # Writes between commits
+    COMMIT_EVERY = 256
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+
+        # Start over if the index was written by a different version
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            self.db.execute("DROP TABLE IF EXISTS Items")
+            self.db.execute("DROP TABLE IF EXISTS Records")
+            self.db.execute(f"PRAGMA user_version = {self.VERSION}")
+        # Records maps each indexed item to its row in Items, by rowid
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS Records (
+                Id INTEGER PRIMARY KEY,
+                Type TEXT,
+                RecordID INTEGER,
+                ModDate REAL,
+                UNIQUE (Type, RecordID)
+                )""")
+        self.db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS Items USING fts5(
+                Subject, Body, Addresses, Location,
+                tokenize = 'unicode61 remove_diacritics 2'
+                )""")
+        self.pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT count(*) FROM Records").fetchone()[0]
+
+    def moddates(self, name):
+        # ModDate of each indexed record of one type, by RecordID
+        return dict(self.db.execute(
+            "SELECT RecordID, ModDate FROM Records WHERE Type = ?", (name,)
+            ))
+
+    def add(self, name, item, moddate):
+        # Index an item as of its Outlook.sqlite ModDate, replacing it if it
+        # was already indexed
+        self.remove(name, item.RecordID)
+        cur = self.db.execute(
+            "INSERT INTO Records (Type, RecordID, ModDate) VALUES (?, ?, ?)",
+            (name, item.RecordID, moddate)
+            )
+        self.db.execute(
+            "INSERT INTO Items (rowid, Subject, Body, Addresses, Location) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (cur.lastrowid, *self._text(item))
+            )
+        self._written()
+
+    def remove(self, name, record_id):
+        row = self.db.execute(
+            "SELECT Id FROM Records WHERE Type = ? AND RecordID = ?",
+            (name, record_id)
+            ).fetchone()
+        if row is None:
+            return
+        self.db.execute("DELETE FROM Items WHERE rowid = ?", row)
+        self.db.execute("DELETE FROM Records WHERE Id = ?", row)
+        self._written()
+
+    def search(self, query, limit=None, types=None):
+        # (type, RecordID, score) of items matching an FTS5 query, best match
+        # first. Scores are bm25, so lower is better
+        sql = """
+            SELECT r.Type, r.RecordID, bm25(Items) AS Score
+            FROM Items JOIN Records r ON r.Id = Items.rowid
+            WHERE Items MATCH ?"""
+        params = [query]
+        if types is not None:
+            sql += f" AND r.Type IN ({','.join('?' * len(types))})"
+            params += list(types)
+        sql += " ORDER BY Score"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [tuple(r) for r in self.db.execute(sql, params)]
+
+    def commit(self):
+        self.db.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.COMMIT_EVERY:
+            self.commit()
+
+    def _text(self, item):
+        # Subject, body text, addresses and location of an item
+        if type(item) is OlkMessage:
+            # Body and HTMLBody may be deferred OlkPayloads
+            body = str(item.Body) if item.Body else None
+            if not body and item.HTMLBody:
+                body = html_text(str(item.HTMLBody))
+            people = (item.From or list()) + (item.To or list()) + \
+                     (item.CC or list()) + (item.BCC or list())
+            location = None
+        elif type(item) is OlkEvent:
+            body = html_text(str(item.Body)) if item.Body else None
+            people = [item.Organizer] if item.Organizer else list()
+            people += item.Attendees or list()
+            location = item.Location
+        else:
+            raise TypeError('Only messages and events can be indexed')
+        body = body or getattr(item, 'Preview', None)
+        addresses = ' '.join(
+            ' '.join(filter(None, (p.Name, p.Address))) for p in people
+            )
+        return (item.Subject, body, addresses, location)
+
+
+def html_text(html):
+    return BeautifulSoup(html, features='lxml').get_text(' ', strip=True)
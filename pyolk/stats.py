@@ -0,0 +1,180 @@
+"""Opt-in timers and counters for loading and exporting, and the report of
+keys missing from the schemas"""
+
+import logging
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+log = logging.getLogger('pyolk')
+
+
+class OlkStats:
+    """Per-stage timers, bytes read, records per class and handler time per
+    schema field, exportable as a dict or Prometheus text"""
+
+    def __init__(self):
+        # stage -> [seconds, calls]
+        self.timers = defaultdict(lambda: [0.0, 0])
+        self.bytes_read = 0
+        self.records = Counter()
+        # (class, field) -> [seconds, calls]
+        self.handlers = defaultdict(lambda: [0.0, 0])
+
+    @contextmanager
+    def timer(self, stage):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, perf_counter() - start)
+
+    def add_time(self, stage, seconds, calls=1):
+        timer = self.timers[stage]
+        timer[0] += seconds
+        timer[1] += calls
+
+    def add_handler_time(self, name, field, seconds):
+        handler = self.handlers[(name, field)]
+        handler[0] += seconds
+        handler[1] += 1
+
+    def merge(self, other):
+        # Add another OlkStats (e.g. from a worker process) into this one
+        for stage, (seconds, calls) in other.timers.items():
+            self.add_time(stage, seconds, calls)
+        self.bytes_read += other.bytes_read
+        self.records.update(other.records)
+        for key, (seconds, calls) in other.handlers.items():
+            handler = self.handlers[key]
+            handler[0] += seconds
+            handler[1] += calls
+
+    def __getstate__(self):
+        # defaultdicts with lambdas can't be pickled, send plain dicts
+        state = self.__dict__.copy()
+        state['timers'] = dict(self.timers)
+        state['handlers'] = dict(self.handlers)
+        return state
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.timers.update(state.pop('timers'))
+        self.handlers.update(state.pop('handlers'))
+        self.__dict__.update(state)
+
+    def to_dict(self, unmapped=None):
+        # unmapped is the reader's OlkUnmappedKeys, to include its counts
+        out = {
+            'timers': {
+                stage: {'seconds': seconds, 'calls': calls}
+                for stage, (seconds, calls) in self.timers.items()
+                },
+            'bytes_read': self.bytes_read,
+            'records': dict(self.records),
+            'handlers': [
+                {'class': name, 'field': field, 'seconds': seconds, 'calls': calls}
+                for (name, field), (seconds, calls) in self.handlers.items()
+                ],
+            }
+        if unmapped is not None:
+            out['unmapped'] = unmapped.to_dict()
+        return out
+
+    def to_prometheus(self, prefix='pyolk', unmapped=None):
+        # Prometheus text exposition format, all metrics are counters,
+        # including the counts of an OlkUnmappedKeys if one is given
+        lines = list()
+        def metric(name, help, samples):
+            lines.append(f'# HELP {prefix}_{name} {help}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            for labels, value in samples:
+                labels = ','.join(f'{k}="{escape(v)}"' for k, v in labels)
+                labels = '{' + labels + '}' if labels else ''
+                lines.append(f'{prefix}_{name}{labels} {value}')
+
+        metric('stage_seconds_total', 'Time spent in each stage.', [
+            ((('stage', s),), t[0]) for s, t in self.timers.items()
+            ])
+        metric('stage_calls_total', 'Number of times each stage ran.', [
+            ((('stage', s),), t[1]) for s, t in self.timers.items()
+            ])
+        metric('bytes_read_total', 'Bytes of data files parsed.', [
+            ((), self.bytes_read)
+            ])
+        metric('records_total', 'Records loaded, by item class.', [
+            ((('class', c),), n) for c, n in self.records.items()
+            ])
+        if unmapped is not None:
+            metric('unmapped_keys_total', 'Data file keys without a mapping.', [
+                ((('class', c), ('key', k)), n) for c, k, n in unmapped
+                ])
+        metric('handler_seconds_total', 'Time spent in field handlers.', [
+            ((('class', c), ('field', f)), t[0])
+            for (c, f), t in self.handlers.items()
+            ])
+        metric('handler_calls_total', 'Number of field handler calls.', [
+            ((('class', c), ('field', f)), t[1])
+            for (c, f), t in self.handlers.items()
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+class OlkUnmappedKeys:
+    """Count of each (class, key) pair found in data files but not in the
+    schemas, logged as one summary rather than once per file"""
+
+    def __init__(self):
+        self.counts = Counter()
+        # total count as of the last summary, so it's only logged again if
+        # there are new keys
+        self._logged = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        # (class, key, count), most common first
+        for (name, key), count in self.counts.most_common():
+            yield (name, key, count)
+
+    def add(self, name, key):
+        if (name, key) not in self.counts:
+            log.debug('Unmapped key %s in %s', key, name)
+        self.counts[(name, key)] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def count(self, name, key):
+        return self.counts[(name, key)]
+
+    def classes(self):
+        return sorted(set(name for name, _ in self.counts))
+
+    def keys(self, name):
+        # Unmapped keys of one class, with their counts
+        return {k: n for (c, k), n in self.counts.items() if c == name}
+
+    def to_dict(self):
+        return [
+            {'class': name, 'key': key, 'count': count}
+            for name, key, count in self
+            ]
+
+    def log_summary(self):
+        total = sum(self.counts.values())
+        if total == self._logged:
+            return
+        self._logged = total
+        lines = [f'  {name} {key}: {count}' for name, key, count in self]
+        # the summary isn't subject to the log limit
+        log.warning(
+            '%d unmapped keys found %d times:\n%s',
+            len(self.counts), total, '\n'.join(lines), extra={'limit': False}
+            )
+
+
+def escape(value):
+    # Escape a Prometheus label value
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
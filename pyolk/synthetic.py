@@ -0,0 +1,464 @@
+"""Write synthetic Outlook caches, for benchmarking without a real profile"""
+
+import os
+import random
+import sqlite3
+from struct import pack
+
+from datafiles import format_key, parse_key
+
+MAGIC = b'\xd0\x0d\x00\x00'
+EPOCH_2001 = 978307200
+
+def _key(key):
+    # Size table keys are stored as BBBB AAAA (index, then variant type)
+    vartype, idx = parse_key(key)
+    return pack('<H', idx) + pack('>H', vartype)
+
+def collection(fields):
+    # Inverse of OlkDataFile._parse_collection
+    head = b''.join(_key(k) + pack('<i', len(v)) for k, v in fields)
+    body = b''.join(v for _, v in fields)
+    return pack('<3i', len(fields), 12 + len(head), len(body)) + head + body
+
+def collection_list(items):
+    # Inverse of OlkDataFile._parse_list
+    items = [collection(i) for i in items]
+    sizes = pack('<' + str(len(items)) + 'h', *map(len, items))
+    return pack('<i', len(items)) + sizes + b''.join(items)
+
+def user(name, address, user_type=2):
+    # Inverse of OlkDataFile._message_user_parse
+    email = address.encode()
+    name = name.encode('utf-16-le')
+    return pack('<h4b', 3, user_type, 3, 0, 0) + bytes(22) + \
+           pack('<i', len(email)) + email + pack('<i', len(name)) + name
+
+def user_list(users):
+    # Inverse of OlkDataFile._message_user_list_parse
+    out = pack('<ib', len(users), 2)
+    for u in users:
+        out += pack('<h', len(u)) + u
+    return out
+
+def actions_taken(actions):
+    # Inverse of OlkDataFile._actions_taken_parse
+    fields = [('00:01', pack('<h', len(actions)))]
+    for i, (action, date, record_id) in enumerate(actions):
+        fields.append((format_key(0x00, 100 + i*10), pack('<h', action)))
+        fields.append((format_key(0x00, 101 + i*10), pack('<d', date)))
+        fields.append((format_key(0x00, 102 + i*10), pack('<i', record_id)))
+    return collection(fields)
+
+def text(s):
+    return s.encode('utf-16-le')
+
+def mac_date(ts):
+    return pack('<d', ts - EPOCH_2001)
+
+def win_minutes(ts):
+    return pack('<i', int(ts // 60) + 194074560)
+
+def entity(record_id, class_id, block_type, fields):
+    # Inverse of OlkDataFile._parse_entity
+    return MAGIC + bytes(4) + pack('<i', 1) + \
+           pack('<ii', record_id, class_id) + bytes(12) + \
+           block_type.encode()[::-1] + bytes(4) + collection(fields)
+
+def block(block_type, payload):
+    # Inverse of OlkDataFile._parse_block
+    return MAGIC + bytes(4) + pack('<i', 2) + bytes(20) + \
+           block_type.encode()[::-1] + bytes(4) + payload
+
+def timezone():
+    standard = [
+        ('7453:7453', win_minutes(0)),
+        ('7453:6C52', b'FREQ=YEARLY;BYMONTH=11;BYDAY=1SU'),
+        ('7453:6F54', b'-0500'),
+        ('7453:7246', b'-0400'),
+        ]
+    daylight = [
+        ('4C44:7453', win_minutes(0)),
+        ('4C44:6C52', b'FREQ=YEARLY;BYMONTH=3;BYDAY=2SU'),
+        ('4C44:6F54', b'-0400'),
+        ('4C44:7246', b'-0500'),
+        ]
+    return collection([
+        ('4643:7A74', b'America/New_York'),
+        ('5A54:4449', pack('<i', 11)),
+        ('1F:01', text('Eastern Time')),
+        ('0D:3F01', collection_list([standard])),
+        ('0D:4001', collection_list([daylight])),
+        ])
+
+
+SCHEMA = """
+CREATE TABLE Mail (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY,
+    Record_FolderID INTEGER, Record_AccountUID INTEGER, Record_ModDate INTEGER,
+    Message_type INTEGER, Message_HasAttachment INTEGER, Message_Hidden INTEGER,
+    Message_ImapUID INTEGER, Message_IsOutgoingMessage INTEGER,
+    Message_MarkedForDelete INTEGER, Message_MentionedMe INTEGER,
+    Message_MessageID TEXT, Message_NormalizedSubject TEXT,
+    Message_PartiallyDownloaded INTEGER, Message_DownloadState INTEGER,
+    Message_ReadFlag INTEGER, Message_RecipientList TEXT,
+    Message_DisplayTo TEXT, Message_Preview TEXT, Message_SenderList TEXT,
+    Message_Sent INTEGER, Message_Size INTEGER, Message_Status INTEGER,
+    Message_SuppressAutoBackfill INTEGER, Conversation_ConversationID INTEGER,
+    Message_ThreadTopic TEXT, Message_TimeReceived INTEGER,
+    Message_TimeSent INTEGER, Record_DueDate INTEGER,
+    Record_ExchangeOrEasId TEXT, Record_ExchangeChangeKey TEXT,
+    Record_FlagStatus INTEGER, Record_Priority INTEGER,
+    Record_HasReminder INTEGER, Message_InferenceClassification INTEGER);
+CREATE TABLE CalendarEvents (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY, Record_FolderID INTEGER,
+    Record_AccountUID INTEGER, Record_ModDate INTEGER,
+    Calendar_StartDateUTC INTEGER, Calendar_EndDateUTC INTEGER,
+    Calendar_IsRecurring INTEGER, Calendar_RecurrenceID INTEGER,
+    Calendar_AttendeeCount INTEGER, Calendar_AllowNewTimeProposal INTEGER,
+    Record_UUID BLOB, Calendar_HasReminder INTEGER,
+    Calendar_MasterRecordID INTEGER, Record_ExchangeOrEasId TEXT,
+    Record_ExchangeChangeKey TEXT);
+CREATE TABLE Folders (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY,
+    Record_ModDate INTEGER, Record_AccountUID INTEGER, Folder_ParentID INTEGER,
+    Folder_FolderClass INTEGER, Folder_FolderType INTEGER,
+    Folder_SpecialFolderType INTEGER, Folder_Name TEXT,
+    Folder_ContainsPartialDwnldMsgs INTEGER, Record_ExchangeOrEasId TEXT,
+    Record_ExchangeChangeKey TEXT, Folder_OnlineFolderType INTEGER,
+    Folder_SubFolderSyncMapReset INTEGER, Folder_SyncMapReset INTEGER,
+    Folder_IgnoreReminders INTEGER);
+CREATE TABLE Tasks (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY,
+    Record_ModDate INTEGER, Record_FolderID INTEGER, Record_AccountUID INTEGER,
+    Task_Completed INTEGER, Record_DueDate INTEGER,
+    Record_ExchangeOrEasId TEXT, Record_ExchangeChangeKey TEXT,
+    Record_StartDate INTEGER, Record_HasReminder INTEGER, Record_UUID BLOB,
+    Task_Name TEXT);
+CREATE TABLE Notes (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY,
+    Record_ModDate INTEGER, Record_FolderID INTEGER, Record_AccountUID INTEGER,
+    Record_ExchangeOrEasId TEXT, Record_ExchangeChangeKey TEXT,
+    Record_UUID BLOB, Note_Title TEXT);
+CREATE TABLE Contacts (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY,
+    Record_ModDate INTEGER, Record_FolderID INTEGER, Record_AccountUID INTEGER,
+    Contact_ContactRecType INTEGER, Contact_DisplayName TEXT,
+    Contact_DisplayNameSort TEXT, Contact_LanguageID INTEGER,
+    Record_DueDate INTEGER, Record_ExchangeOrEasId TEXT,
+    Record_ExchangeChangeKey TEXT, Record_FlagStatus INTEGER,
+    Record_StartDate INTEGER, Record_UUID BLOB, Record_HasReminder INTEGER);
+CREATE TABLE Categories (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY, Record_AccountUID INTEGER,
+    Category_Name TEXT, Category_Exchange_IsLocalCategory INTEGER,
+    Cateogry_ExchangeGuid TEXT, Category_BackgroundColor INTEGER);
+CREATE TABLE Signatures (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY);
+CREATE TABLE SavedSpotlightSearch (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY);
+CREATE TABLE Main (PathToDataFile TEXT, Record_RecordID INTEGER PRIMARY KEY);
+CREATE TABLE AccountsMail (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY,
+    Account_AssociatedAccountOfUID INTEGER, Account_Name TEXT,
+    Account_EmailAddress TEXT, Account_DeviceGuid TEXT,
+    Account_ServerType INTEGER);
+CREATE TABLE AccountsExchange (PathToDataFile TEXT,
+    Record_RecordID INTEGER PRIMARY KEY,
+    Account_AssociatedAccountOfUID INTEGER, Account_LdapAccountUID INTEGER,
+    Account_MailAccountUID INTEGER, Account_Name TEXT,
+    Account_EmailAddress TEXT);
+CREATE TABLE Blocks (BlockTag INTEGER, BlockID INTEGER, PathToDataFile TEXT);
+CREATE TABLE Mail_OwnedBlocks (Record_RecordID INTEGER, BlockTag INTEGER,
+    BlockID INTEGER);
+CREATE TABLE Contacts_OwnedBlocks (Record_RecordID INTEGER, BlockTag INTEGER,
+    BlockID INTEGER);
+CREATE TABLE Mail_Categories (Record_RecordID INTEGER,
+    Category_RecordID INTEGER);
+CREATE TABLE CalendarEvents_Categories (Record_RecordID INTEGER,
+    Category_RecordID INTEGER);
+CREATE TABLE Tasks_Categories (Record_RecordID INTEGER,
+    Category_RecordID INTEGER);
+CREATE TABLE Notes_Categories (Record_RecordID INTEGER,
+    Category_RecordID INTEGER);
+CREATE TABLE Contacts_Categories (Record_RecordID INTEGER,
+    Category_RecordID INTEGER);
+"""
+
+WORDS = (
+    'quarterly report budget meeting lunch review draft project update '
+    'invoice schedule travel plans agenda notes follow up design launch '
+    'feedback proposal contract hiring roadmap release customer team'
+    ).split()
+
+
+class OlkCacheWriter:
+    """Write a synthetic Outlook profile that PyOLKReader can load"""
+
+    def __init__(self, path, seed=0):
+        self.path = path
+        self.random = random.Random(seed)
+        self.next_id = 1
+        self.next_block = 1
+        self.now = 1600000000
+        os.makedirs(path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, 'Outlook.sqlite'))
+        self.db.executescript(SCHEMA)
+
+    def write(self, messages=1000, events=100, contacts=100, notes=10,
+              tasks=10, folders=5, body_size=2000, categories=3):
+        # Accounts and settings
+        self._main()
+        self._account_mail()
+        self._account_exchange()
+        self._signature()
+        self._search()
+        cats = [self._category(i) for i in range(categories)]
+
+        # Folder tree, one root with all folders as children
+        root = self._folder('Root', None)
+        fldrs = [self._folder('Folder ' + str(i), root) for i in range(folders)]
+
+        for _ in range(messages):
+            self._message(self.random.choice(fldrs), body_size, cats)
+        for _ in range(events):
+            self._event(self.random.choice(fldrs), body_size, cats)
+        for _ in range(contacts):
+            self._contact(self.random.choice(fldrs), cats)
+        for _ in range(notes):
+            self._note(self.random.choice(fldrs), body_size, cats)
+        for _ in range(tasks):
+            self._task(self.random.choice(fldrs), body_size, cats)
+
+        self.db.commit()
+        self.db.close()
+
+    def _record_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    def _words(self, n):
+        return ' '.join(self.random.choice(WORDS) for _ in range(n))
+
+    def _write(self, folder, name, data):
+        rel = os.path.join(folder, name)
+        os.makedirs(os.path.join(self.path, folder), exist_ok=True)
+        with open(os.path.join(self.path, rel), 'wb') as f:
+            f.write(data)
+        return rel.replace(' ', '%20')
+
+    def _entity(self, folder, record_id, class_id, block_type, fields):
+        name = str(record_id) + '.olk15' + folder.rstrip('s').replace(' ', '')
+        return self._write(folder, name,
+                           entity(record_id, class_id, block_type, fields))
+
+    def _block(self, table, record_id, block_type, payload):
+        block_id = self.next_block
+        self.next_block += 1
+        path = self._write('Message Attachments', str(block_id) + '.olk15Block',
+                           block(block_type, payload))
+        self.db.execute("INSERT INTO Blocks VALUES (1, ?, ?)", (block_id, path))
+        self.db.execute(f"INSERT INTO {table}_OwnedBlocks VALUES (?, 1, ?)",
+                        (record_id, block_id))
+
+    def _categorize(self, table, record_id, cats):
+        for c in self.random.sample(cats, self.random.randint(0, len(cats))):
+            self.db.execute(f"INSERT INTO {table}_Categories VALUES (?, ?)",
+                            (record_id, c))
+
+    def _main(self):
+        rid = self._record_id()
+        path = self._entity('Main', rid, 1, 'Main', [
+            ('0B:6601', pack('<?', False)),
+            ('02:3101', pack('<h', 1033)),
+            ('1F:3B01', text('Default')),
+            ])
+        self.db.execute("INSERT INTO Main VALUES (?, ?)", (path, rid))
+
+    def _account_mail(self):
+        rid = self._record_id()
+        path = self._entity('Accounts', rid, 14, 'AcMl', [
+            ('1F:2E01', text('user')),
+            ('1E:2D01', b'imap.example.com'),
+            ('03:2C01', b'PAMI'),
+            ])
+        self.db.execute(
+            "INSERT INTO AccountsMail VALUES (?, ?, 0, 'Mail', "
+            "'user@example.com', 'guid', 1)", (path, rid))
+
+    def _account_exchange(self):
+        rid = self._record_id()
+        path = self._entity('Accounts', rid, 5, 'AcEx', [
+            ('1F:2C01', text('Exchange')),
+            ('1E:2D01', b'https://outlook.example.com'),
+            ])
+        self.db.execute(
+            "INSERT INTO AccountsExchange VALUES (?, ?, 0, 0, 0, 'Exchange', "
+            "'user@example.com')", (path, rid))
+
+    def _signature(self):
+        rid = self._record_id()
+        path = self._entity('Signatures', rid, 21, 'Sign', [
+            ('1F:3901', text('Signature')),
+            ('1F:3A01', text('<p>Regards</p>')),
+            ('4D:04', mac_date(self.now)),
+            ])
+        self.db.execute("INSERT INTO Signatures VALUES (?, ?)", (path, rid))
+
+    def _search(self):
+        rid = self._record_id()
+        path = self._entity('Saved Searches', rid, 19, 'SSrc', [
+            ('1F:01', text('Unread')),
+            ('03:04', pack('<i', 1)),
+            ('4D:04', mac_date(self.now)),
+            ])
+        self.db.execute("INSERT INTO SavedSpotlightSearch VALUES (?, ?)",
+                        (path, rid))
+
+    def _category(self, i):
+        rid = self._record_id()
+        path = self._entity('Categories', rid, 9, 'Catg', [
+            ('1F:3501', text('Category ' + str(i))),
+            ('4D:3301', mac_date(self.now)),
+            ])
+        self.db.execute(
+            "INSERT INTO Categories VALUES (?, ?, 0, ?, 1, 'guid', 0)",
+            (path, rid, 'Category ' + str(i)))
+        return rid
+
+    def _folder(self, name, parent):
+        rid = self._record_id()
+        path = self._entity('Folders', rid, 2, 'Fldr', [
+            ('1F:3601', text(name)),
+            ('03:5101', pack('<i', 0)),
+            ])
+        self.db.execute(
+            "INSERT INTO Folders VALUES (?, ?, ?, 0, ?, 0, 0, 0, ?, 0, '', '', "
+            "0, 0, 0, 0)", (path, rid, self.now, parent or 0, name))
+        return rid
+
+    def _message(self, folder, body_size, cats):
+        rid = self._record_id()
+        ts = self.now - self.random.randint(0, 10**8)
+        subject = self._words(6)
+        body = self._words(body_size // 8)
+        sender = user('Sender', 'sender@example.com')
+        to = [user('Person ' + str(i), 'p' + str(i) + '@example.com')
+              for i in range(self.random.randint(1, 4))]
+        path = self._entity('Message Sources', rid, 3, 'MSrc', [
+            ('1F:01', text(subject)),
+            ('1F:1E', text('<p>' + body + '</p>')),
+            ('1F:62', text('<html><body>' + body + '</body></html>')),
+            ('0D:03', user_list([sender])),
+            ('0D:1E', user_list(to)),
+            ('0D:1F', user_list(to[:1])),
+            ('0D:C1', actions_taken([(2, ts - EPOCH_2001, rid)])),
+            ('1E:22', b'<reply@example.com>'),
+            ('1E:24', b'<ref@example.com>'),
+            ('4D:01', mac_date(ts)),
+            ('02:80', pack('<h', 0)),
+            ('0B:3D', pack('<?', True)),
+            ('03:05', pack('<i', len(body))),
+            ])
+        self.db.execute(
+            "INSERT INTO Mail VALUES (?, ?, ?, 0, ?, 0, 0, 0, 0, 0, 0, 0, ?, ?, "
+            "0, 0, ?, '', '', ?, 'sender@example.com', 1, ?, 0, 0, 0, ?, ?, ?, "
+            "0, '', '', 0, 3, 0, 0)",
+            (path, rid, folder, ts, '<' + str(rid) + '@example.com>', subject,
+             self.random.randint(0, 1), body[:100], len(body), subject, ts, ts))
+        self._categorize('Mail', rid, cats)
+        if self.random.random() < 0.1:
+            self._block('Mail', rid, 'MSrc',
+                        ('Subject: ' + subject + '\r\n\r\n' + body).encode())
+
+    def _event(self, folder, body_size, cats):
+        rid = self._record_id()
+        ts = self.now - self.random.randint(0, 10**8)
+        attendees = [[
+            ('03:01', pack('<i', 0)),
+            ('03:02', pack('<i', 0)),
+            ('1F:01', text('Person ' + str(i))),
+            ('1E:01', ('p' + str(i) + '@example.com').encode()),
+            ] for i in range(self.random.randint(0, 4))]
+        path = self._entity('Events', rid, 8, 'CAL ', [
+            ('1F:02', text(self._words(4))),
+            ('1F:01', text('<p>' + self._words(body_size // 8) + '</p>')),
+            ('1F:04', text('Room ' + str(rid))),
+            ('03:17', win_minutes(ts)),
+            ('03:18', win_minutes(ts + 3600)),
+            ('4D:17', mac_date(ts)),
+            ('4D:18', mac_date(ts)),
+            ('4D:12', mac_date(ts)),
+            ('0D:09', timezone()),
+            ('0B:07', pack('<?', False)),
+            ('0D:0D', user('Organizer', 'org@example.com.xxx')),
+            ('0D:0B', collection_list(attendees)),
+            ('03:1D', pack('<i', 0)),
+            ('02:81', pack('<h', 3)),
+            ('02:80', pack('<h', 0)),
+            ])
+        self.db.execute(
+            "INSERT INTO CalendarEvents VALUES (?, ?, ?, 0, ?, ?, ?, 0, 0, ?, 1, "
+            "?, 0, 0, '', '')",
+            (path, rid, folder, ts, ts // 60 + 194074560,
+             (ts + 3600) // 60 + 194074560, len(attendees),
+             self.random.randbytes(16)))
+        self._categorize('CalendarEvents', rid, cats)
+
+    def _contact(self, folder, cats):
+        rid = self._record_id()
+        first, last = self._words(1).title(), self._words(1).title()
+        path = self._entity('Contacts', rid, 4, 'Cntc', [
+            ('1F:01', text(first)),
+            ('1F:02', text(last)),
+            ('1D:66', (first + '@example.com').encode()),
+            ('03:64', pack('<i', 1)),
+            ('03:E4', pack('<i', 1)),
+            ('1F:4B', text('Sat, Jan 01, 2000')),
+            ])
+        self.db.execute(
+            "INSERT INTO Contacts VALUES (?, ?, ?, ?, 0, 0, ?, ?, 1033, ?, '', '', "
+            "0, ?, ?, 0)",
+            (path, rid, self.now, folder, first + ' ' + last,
+             last + ', ' + first, self.now, self.now,
+             self.random.randbytes(16)))
+        self._categorize('Contacts', rid, cats)
+        if self.random.random() < 0.1:
+            self._block('Contacts', rid, 'ImgB', self.random.randbytes(2048))
+
+    def _note(self, folder, body_size, cats):
+        rid = self._record_id()
+        title = self._words(3)
+        path = self._entity('Notes', rid, 6, 'Note', [
+            ('1F:3701', text(title)),
+            ('1F:3801', text('<p>' + self._words(body_size // 8) + '</p>')),
+            ('4D:3101', mac_date(self.now)),
+            ])
+        self.db.execute(
+            "INSERT INTO Notes VALUES (?, ?, ?, ?, 0, '', '', ?, ?)",
+            (path, rid, self.now, folder, self.random.randbytes(16), title))
+        self._categorize('Notes', rid, cats)
+
+    def _task(self, folder, body_size, cats):
+        rid = self._record_id()
+        name = self._words(3)
+        path = self._entity('Tasks', rid, 7, 'Task', [
+            ('1F:0B', text(self._words(body_size // 8))),
+            ('4D:0A', mac_date(self.now)),
+            ('4D:0C', mac_date(self.now)),
+            ])
+        self.db.execute(
+            "INSERT INTO Tasks VALUES (?, ?, ?, ?, 0, 0, ?, '', '', ?, 0, ?, ?)",
+            (path, rid, self.now, folder, self.now, self.now,
+             self.random.randbytes(16), name))
+        self._categorize('Tasks', rid, cats)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=100)
+    parser.add_argument('--contacts', type=int, default=100)
+    parser.add_argument('--body-size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    OlkCacheWriter(args.path, args.seed).write(
+        messages=args.messages, events=args.events, contacts=args.contacts,
+        body_size=args.body_size
+        )
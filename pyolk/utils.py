@@ -1,5 +1,7 @@
-from collections import defaultdict
+import logging
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from struct import unpack
 from base64 import b64decode, b64encode
@@ -7,6 +9,38 @@ from quopri import decodestring
 from email import message_from_string
 import re
 
+
+class OlkLogLimit(logging.Filter):
+    """Only let the first few records with each message through, until the
+    counts are reset"""
+
+    def __init__(self, limit=10):
+        super().__init__()
+        self.limit = limit
+        self.counts = Counter()
+
+    def reset(self):
+        self.counts.clear()
+
+    def filter(self, record):
+        # Records logged with extra={'limit': False} always go through
+        if not getattr(record, 'limit', True):
+            return True
+        # Messages are counted by their format string, not their arguments
+        count = self.counts[record.msg] = self.counts[record.msg] + 1
+        if count == self.limit:
+            first, sep, rest = record.msg.partition('\n')
+            record.msg = first + ' (repeats of this message are suppressed)' \
+                + sep + rest
+        return count <= self.limit
+
+
+# Parsing problems are logged here, rate limited per message, the reader
+# resets the limits each time it loads the archive
+log = logging.getLogger('pyolk')
+log_limit = OlkLogLimit()
+log.addFilter(log_limit)
+
 # helper functions
 def hex_str(n):
     return hex(n)[2:].upper().rjust(2, '0')
@@ -14,19 +48,22 @@ def hex_str(n):
 def hex_str_arr(bin_array, delim=''):
     return delim.join(map(hex_str, bin_array))
 
+@lru_cache(maxsize=None)
+def tz_epoch(year, tz):
+    # Midnight on Jan 1 of year in tz, timestamps are offsets from this
+    return datetime(year, 1, 1, tzinfo=ZoneInfo(tz))
+
 def dt_winminutes(m, tz='UTC'):
     # Windows timestamp: minutes since 1601-01-01
     try:
-        dt = datetime(1601, 1, 1) + timedelta(seconds=m * 60)
-        return dt.replace(tzinfo=ZoneInfo(tz))
+        return tz_epoch(1601, tz) + timedelta(minutes=m)
     except OverflowError:
-        print('datetime overflow: ' + str(m))
+        log.warning('datetime overflow: %s', m)
         return datetime.max
 
 def dt_macabsolute(s, tz='UTC'):
     # Apple Mac Absolute timestamp: seconds since 2001-01-01
-    dt = datetime(2001, 1, 1) + timedelta(seconds=s)
-    return dt.replace(tzinfo=ZoneInfo(tz))
+    return tz_epoch(2001, tz) + timedelta(seconds=s)
 
 def localtime(dt, tz='America/New_York'):
     # Return local time in Y-M-D H:M:S format